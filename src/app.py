@@ -1,34 +1,43 @@
-import json
+import os
+import queue
 import threading
 import urllib.parse
-import webbrowser
-import xml.etree.ElementTree as ET
 import tkinter as tk
+from functools import partial
 from pathlib import Path
+from typing import Callable
 from tkinter import ttk, messagebox, filedialog
 
-try:
-    from PIL import Image, ImageTk
-    _PIL_OK = True
-except ImportError:
-    _PIL_OK = False
-
 from src.core.config_manager import (
-    CONFIG_PATH, MEDIA_FOLDERS, IMAGE_SUFFIXES, VIDEO_SUFFIXES, THUMB_W, THUMB_H,
-    detect_environment, discover_systems, resolve_paths,
+    MEDIA_FOLDERS, IMAGE_SUFFIXES, VIDEO_SUFFIXES,
+    detect_environment, discover_systems, resolve_paths, save_config,
 )
-from src.core.xml_handler import parse_gamelist, serialize_gamelist, save_gamelist_file
+from src.core.xml_handler import ET, parse_gamelist, serialize_gamelist, save_gamelist_file
 from src.core.sync_manager import _PARAMIKO_OK, test_connection, transfer_files, pull_files
 from src.media.processor import (
-    get_rom_stem, find_media_files,
+    get_rom_stem, find_media_files, invalidate_media_cache,
+    pil_available, submit_thumbnail, thumbnail_photo,
     open_with_default_app, open_fullsize_image,
     open_url_download_dialog, open_cover_crop_dialog,
     open_miximage_dialog,
     open_media_check_window,
 )
-from src.media.box3d import open_3dbox_dialog
 from src.widgets.custom_inputs import DateInput, TagInput
 
+# メディアタブの「ファイル選択...」で使うファイル種別（拡張子の集合は不変なので一度だけ組み立てる）
+_MEDIA_FILETYPES = (
+    ("画像ファイル", " ".join(f"*{s}" for s in sorted(IMAGE_SUFFIXES))),
+    ("動画ファイル", " ".join(f"*{s}" for s in sorted(VIDEO_SUFFIXES))),
+    ("PDFファイル", "*.pdf"),
+    ("すべてのファイル", "*.*"),
+)
+
+
+def _open_browser(url: str) -> None:
+    """既定のブラウザで URL を開く。webbrowser は使うときまでインポートしない。"""
+    import webbrowser
+    webbrowser.open(url)
+
 
 def build_ui(root: tk.Tk, config: dict) -> None:
     root.title("kakehashi")
@@ -46,10 +55,17 @@ def build_ui(root: tk.Tk, config: dict) -> None:
     btn_media_check = tk.Button(topbar, text="メディアチェック", font=("Arial", 9), state="disabled")
     btn_media_check.pack(side="right", padx=(4, 8), pady=5)
 
-    systems = discover_systems(config)
-    current_system = config.get("system", systems[0] if systems else "")
+    # システム一覧のフォルダ走査はドロップダウンを初めて開くまで行わない（config に system がない場合を除く）
+    if "system" in config:
+        current_system = config["system"]
+    else:
+        current_system = next(iter(discover_systems(config)), "")
     system_var = tk.StringVar(value=current_system)
-    combo = ttk.Combobox(topbar, textvariable=system_var, values=systems, state="readonly", width=10, font=("Arial", 9))
+    combo = ttk.Combobox(
+        topbar, textvariable=system_var, values=(current_system,) if current_system else (),
+        state="readonly", width=10, font=("Arial", 9),
+        postcommand=lambda: combo.configure(values=discover_systems(config)),
+    )
     combo.pack(side="right", padx=(4, 8), pady=5)
     tk.Label(topbar, text="対象機種:", font=("Arial", 9), bg="#f5f5f5").pack(side="right", pady=5)
 
@@ -70,8 +86,9 @@ def build_ui(root: tk.Tk, config: dict) -> None:
     lb_frame.pack(fill="both", expand=True, padx=4, pady=(0, 4))
     lb_scroll = tk.Scrollbar(lb_frame)
     lb_scroll.pack(side="right", fill="y")
+    listbox_var = tk.StringVar()  # 表示名の Tcl リスト。delete/insert の結果もここに反映される
     listbox = tk.Listbox(
-        lb_frame, yscrollcommand=lb_scroll.set,
+        lb_frame, listvariable=listbox_var, yscrollcommand=lb_scroll.set,
         font=("Arial", 9), selectmode="single",
         activestyle="none", bd=0, highlightthickness=0,
     )
@@ -127,6 +144,36 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         ("genre",       "ジャンル", "tags"),
     ]
     field_widgets: dict[str, tk.Widget] = {}
+    # 入力欄ごとの変更検知。Entry は textvariable の書き込みで _dirty にキーを入れ、
+    # Text は edit_modified()、TagInput / DateInput は is_modified() で判定する
+    _dirty: set[str] = set()
+    _entry_vars: dict[str, tk.StringVar] = {}
+    # (キー, 値の取得, 値の設定, 変更されたか)。ウィジェット種別の判定は生成時に1回だけ行う
+    form_ops: list[tuple[str, Callable[[], str], Callable[[str], None], Callable[[], bool]]] = []
+
+    def _make_form_ops(key: str, widget: tk.Widget) -> tuple:
+        if isinstance(widget, TagInput):
+            return (
+                key,
+                lambda: ", ".join(widget.get_tags()),
+                lambda v: widget.set_tags([t.strip() for t in v.split(",") if t.strip()]),
+                widget.is_modified,
+            )
+        if isinstance(widget, DateInput):
+            return key, widget.get_date_str, widget.set_date_str, widget.is_modified
+        if isinstance(widget, tk.Text):
+            def _set_text(v: str) -> None:
+                widget.delete("1.0", "end")
+                widget.insert("1.0", v)
+                widget.edit_modified(False)
+            return (
+                key,
+                lambda: widget.get("1.0", "end-1c").strip(),
+                _set_text,
+                lambda: bool(widget.edit_modified()),
+            )
+        var = _entry_vars[key]
+        return key, lambda: var.get().strip(), var.set, lambda: key in _dirty
 
     for r, (key, label_ja, wtype) in enumerate(fields):
         grid_row = r + 3
@@ -149,9 +196,12 @@ def build_ui(root: tk.Tk, config: dict) -> None:
             widget = TagInput(form)
             widget.grid(row=grid_row, column=1, sticky="ew", pady=(2, 2), padx=(4, 0))
         else:  # entry
-            widget = tk.Entry(form, font=("Arial", 9))
+            var = _entry_vars[key] = tk.StringVar()
+            var.trace_add("write", lambda *_, k=key: _dirty.add(k))
+            widget = tk.Entry(form, font=("Arial", 9), textvariable=var)
             widget.grid(row=grid_row, column=1, sticky="ew", pady=(2, 2), padx=(4, 0))
         field_widgets[key] = widget
+        form_ops.append(_make_form_ops(key, widget))
 
     # ── タブ2: メディア ────────────────────────────────────
     tab_media = tk.Frame(notebook)
@@ -186,12 +236,26 @@ def build_ui(root: tk.Tk, config: dict) -> None:
     media_scroll_frame.bind("<Configure>", _on_media_scroll_frame_configure)
     media_canvas.bind("<Configure>", _on_media_canvas_configure)
 
-    # マウスホイールスクロール（キャンバスにフォーカスがある間のみ）
+    # マウスホイールスクロール（ポインタがキャンバス内の行の上にある間のみ）
+    # 行ラベルやボタンの上でも効くよう bind_all で1回だけ登録し、発生元で絞り込む
     def _on_media_mousewheel(e) -> None:
-        media_canvas.yview_scroll(int(-1 * (e.delta / 120)), "units")
+        w = e.widget
+        if not isinstance(w, tk.Misc) or w.winfo_toplevel() is not root:
+            return  # ダイアログ（Toplevel）内のイベントは対象外
+        path, canvas_path = str(w), str(media_canvas)
+        if path != canvas_path and not path.startswith(canvas_path + "."):
+            return
+        if e.num == 4:
+            step = -1
+        elif e.num == 5:
+            step = 1
+        else:
+            step = int(-1 * (e.delta / 120))
+        media_canvas.yview_scroll(step, "units")
 
-    media_canvas.bind("<Enter>", lambda e: media_canvas.bind_all("<MouseWheel>", _on_media_mousewheel))
-    media_canvas.bind("<Leave>", lambda e: media_canvas.unbind_all("<MouseWheel>"))
+    media_canvas.bind_all("<MouseWheel>", _on_media_mousewheel, add="+")
+    media_canvas.bind_all("<Button-4>",   _on_media_mousewheel, add="+")
+    media_canvas.bind_all("<Button-5>",   _on_media_mousewheel, add="+")
 
     # ── タブ3: 同期 ─────────────────────────────────────────────
     tab_sync = tk.Frame(notebook)
@@ -257,9 +321,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
                 "password": sync_pass_var.get(),
             })
             try:
-                CONFIG_PATH.write_text(
-                    json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8"
-                )
+                save_config(config)
             except Exception as e:
                 messagebox.showerror("保存エラー", str(e))
 
@@ -371,11 +433,36 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         sync_log.pack(fill="both", expand=True)
         _log_sb.config(command=sync_log.yview)
 
+        # ワーカースレッドからのログ行と進捗は一旦溜め、メインスレッドの _drain_log でまとめて反映する
+        _log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _progress = [0, 0]  # [ワーカーが書いた最新の進捗(%), プログレスバーに反映済みの値]
+
         def _log(msg: str) -> None:
-            sync_log.config(state="normal")
-            sync_log.insert("end", msg + "\n")
-            sync_log.see("end")
-            sync_log.config(state="disabled")
+            """どのスレッドからでも呼べる。表示は最大 50ms 遅れる。"""
+            _log_queue.put(msg)
+
+        def _set_progress(value: int) -> None:
+            """どのスレッドからでも呼べる。ファイルごとに Tk のイベントを積まないよう値を置くだけ。"""
+            _progress[0] = value
+
+        def _drain_log() -> None:
+            if _progress[0] != _progress[1]:
+                _progress[1] = _progress[0]
+                sync_progress["value"] = _progress[1]
+            lines: list[str] = []
+            while len(lines) < 200:
+                try:
+                    lines.append(_log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if lines:
+                sync_log.config(state="normal")
+                sync_log.insert("end", "\n".join(lines) + "\n")
+                sync_log.see("end")
+                sync_log.config(state="disabled")
+            tab_sync.after(50, _drain_log)
+
+        _drain_log()
 
         def _clear_log() -> None:
             sync_log.config(state="normal")
@@ -393,7 +480,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
 
             btn_sync_run.config(state="disabled", text="転送中...")
             _clear_log()
-            sync_progress["value"] = 0
+            _set_progress(0)
 
             system       = system_var.get()
             local_paths  = resolve_paths(config, system)
@@ -417,12 +504,15 @@ def build_ui(root: tk.Tk, config: dict) -> None:
                 for folder, fvar in sync_media_type_vars.items():
                     if not fvar.get():
                         continue
-                    local_folder = local_media_sys / folder
-                    if not local_folder.is_dir():
+                    # DirEntry.is_file() は readdir の結果を使うため、ファイルごとの stat が不要
+                    try:
+                        with os.scandir(local_media_sys / folder) as it:
+                            entries = [e for e in it if e.is_file()]
+                    except (FileNotFoundError, NotADirectoryError):
                         continue
-                    for _f in sorted(local_folder.iterdir()):
-                        if _f.is_file():
-                            tasks.append((_f, f"{remote_media_base}/{system}/{folder}/{_f.name}"))
+                    entries.sort(key=lambda e: e.name)  # ログの並びを毎回同じにする
+                    for e in entries:
+                        tasks.append((Path(e.path), f"{remote_media_base}/{system}/{folder}/{e.name}"))
 
             overwrite = sync_overwrite_var.get()
 
@@ -436,9 +526,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
                         tasks=tasks,
                         overwrite=overwrite,
                         on_log=_log,
-                        on_progress=lambda v: tab_sync.after(
-                            0, lambda _v=v: sync_progress.__setitem__("value", _v)
-                        ),
+                        on_progress=_set_progress,
                     )
                     summary = f"\n[完了] 転送: {ok} / スキップ: {skipped} / エラー: {errors}"
                     _log(summary)
@@ -474,7 +562,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
             btn_pull_run.config(state="disabled", text="プル中...")
             btn_sync_run.config(state="disabled")
             _clear_log()
-            sync_progress["value"] = 0
+            _set_progress(0)
 
             system      = system_var.get()
             local_paths = resolve_paths(config, system)
@@ -513,9 +601,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
                         dir_mappings=dir_mappings,
                         overwrite=overwrite,
                         on_log=_log,
-                        on_progress=lambda v: tab_sync.after(
-                            0, lambda _v=v: sync_progress.__setitem__("value", _v)
-                        ),
+                        on_progress=_set_progress,
                     )
                     summary = f"\n[完了] 取得: {ok} / スキップ: {skipped} / エラー: {errors}"
                     _log(summary)
@@ -544,53 +630,138 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         btn_pull_run.config(command=_run_pull)
 
     _media_img_refs: list = []  # PhotoImage のガベージコレクション防止
+    _media_rows: list[dict] = []  # メディアタブの行ウィジェット（MEDIA_FOLDERS 順）
+    _media_epoch = [0]  # 再描画のたびに増やし、古いサムネイル結果を捨てる
+    _media_shown = [None]  # 最後に描画した (game, タイトル, media_path, 各フォルダのファイル)
 
     # ── ロジック ─────────────────────────────────────────────
-    state: dict = {"root_elem": None, "games": [], "decl": "", "selected": -1}
+    state: dict = {
+        "root_elem": None, "games": [], "decl": "", "selected": -1,
+        "rom_base": "", "rom_dirs": {}, "displays": [], "dirty_games": set(),
+    }
+
+    # 機種名 → resolve_paths の結果。config のパス設定は起動中に変わらないため機種ごとに1回だけ解決する
+    _paths_cache: dict[str, dict] = {}
+
+    def current_paths() -> dict:
+        system = system_var.get()
+        paths = _paths_cache.get(system)
+        if paths is None:
+            paths = _paths_cache[system] = resolve_paths(config, system)
+        return paths
+
+    # game要素 → {タグ: 最初の子要素}。フォームの各項目で game.find を線形に繰り返さないためのもの
+    _field_cache: dict = {}
+
+    def _children_of(game: ET.Element) -> dict:
+        children = _field_cache.get(game)
+        if children is None:
+            children = _field_cache[game] = {c.tag: c for c in reversed(game)}
+        return children
 
     def get_field(game: ET.Element, key: str) -> str:
-        el = game.find(key)
+        el = _children_of(game).get(key)
         return (el.text or "") if el is not None else ""
 
     def set_field(game: ET.Element, key: str, value: str) -> None:
-        el = game.find(key)
+        state["dirty_games"].add(game)  # 保存時にこの <game> だけ再インデントする
+        children = _children_of(game)
+        el = children.get(key)
         if value:
             if el is None:
-                el = ET.SubElement(game, key)
+                el = children[key] = ET.SubElement(game, key)
             el.text = value
         else:
             if el is not None:
                 game.remove(el)
+                nxt = game.find(key)  # 同じタグが重複していた場合は次の要素を見せる
+                if nxt is not None:
+                    children[key] = nxt
+                else:
+                    del children[key]
 
-    def update_media_tab(game: ET.Element | None) -> None:
-        """メディアタブをサムネイル付きテーブルで更新する。"""
-        _media_img_refs.clear()
-        for w in media_scroll_frame.winfo_children():
-            w.destroy()
+    def _build_media_rows() -> None:
+        """MEDIA_FOLDERS の各行のウィジェットを1度だけ生成し、_media_rows に保持する。"""
+        for row_i, folder in enumerate(MEDIA_FOLDERS):
+            bg = "white" if row_i % 2 == 0 else "#f5f5f5"
+            row = tk.Frame(media_scroll_frame, bg=bg)
+
+            # フォルダ名列
+            tk.Label(
+                row, text=folder, font=("Arial", 9), anchor="w",
+                width=14, bg=bg, fg="#444",
+            ).pack(side="left", padx=(10, 4), pady=6)
+
+            # 状態列（"-" / サムネイル / [動画] ▶ など）。クリック時の動作は行ごとに差し替える
+            status = tk.Label(row, bg=bg)
+            status.pack(side="left", padx=4, pady=6)
+            r = {"row": row, "status": status, "on_click": None}
+            status.bind("<Button-1>", lambda e, r=r: r["on_click"] and r["on_click"]())
+
+            btn_f = tk.Frame(row, bg=bg)
+            r["btn_f"] = btn_f
+            for key, text in (("btn_download", "URLからDL"), ("btn_file", "ファイル選択..."), ("btn_search", "検索")):
+                r[key] = tk.Button(btn_f, text=text, font=("Arial", 8))
+                r[key].pack(side="left", padx=2)
+            # cover / screenshot から生成するボタンは対象フォルダの行にだけ置く
+            extra_text = {
+                "marquees": "coverから切り出し",
+                "3dboxes": "coverから3Dbox生成",
+                "miximages": "miximage生成",
+            }.get(folder)
+            r["btn_extra"] = tk.Button(btn_f, text=extra_text, font=("Arial", 8)) if extra_text else None
+
+            r["btn_delete"] = tk.Button(row, text="削除", font=("Arial", 8), fg="#cc0000")
+            _media_rows.append(r)
+
+    def _set_media_status(r: dict, text: str = "", image=None, fg: str = "#007700",
+                          font=("Arial", 9), on_click=None, image_pad: bool = False) -> None:
+        r["status"].config(
+            text=text, image=image or "", fg=fg, font=font,
+            cursor="hand2" if on_click else "",
+        )
+        r["status"].pack_configure(padx=(4, 8) if image_pad else 4, pady=4 if image_pad else 6)
+        r["on_click"] = on_click
+
+    def update_media_tab(game: "ET.Element | None", force: bool = False) -> None:
+        """メディアタブをサムネイル付きテーブルで更新する。
+
+        行ウィジェットは初回に生成したものを使い回し、表示内容とコマンドだけを差し替える。
+        同じゲームを同じメディア構成で表示済みなら何もしない（force=True で再描画する）。
+        """
+        if not _media_rows:
+            _build_media_rows()
 
         if game is None:
-            media_header_label.config(text="ゲームを選択してください", fg="#888", font=("Arial", 9))
+            title = path_val = ""
+        else:
+            title = get_field(game, "name") or get_field(game, "path") or "(不明)"
+            path_val = get_field(game, "path")
+        stem       = get_rom_stem(path_val) if path_val else ""
+        media_path = current_paths()["media_path"]
+        file_map   = find_media_files(media_path, stem) if path_val else {}
+
+        shown_key = (game, title, media_path, tuple(file_map.values()))
+        if not force and shown_key == _media_shown[0]:
             return
+        _media_shown[0] = shown_key
+        _media_epoch[0] += 1
+        epoch = _media_epoch[0]
 
-        title = get_field(game, "name") or get_field(game, "path") or "(不明)"
-        media_header_label.config(text=title, fg="black", font=("Arial", 9, "bold"))
+        if game is None:
+            media_header_label.config(text="ゲームを選択してください", fg="#888", font=("Arial", 9))
+        else:
+            media_header_label.config(text=title, fg="black", font=("Arial", 9, "bold"))
 
-        path_val = get_field(game, "path")
         if not path_val:
+            for r in _media_rows:
+                r["row"].pack_forget()
+            _media_img_refs.clear()
+            _on_media_scroll_frame_configure()
             return
 
-        stem       = get_rom_stem(path_val)
-        media_path = resolve_paths(config, system_var.get())["media_path"]
-        file_map   = find_media_files(media_path, stem)
-
         def _do_file_select(f: str) -> None:
-            filetypes = [
-                ("画像ファイル", " ".join(f"*{s}" for s in sorted(IMAGE_SUFFIXES))),
-                ("動画ファイル", " ".join(f"*{s}" for s in sorted(VIDEO_SUFFIXES))),
-                ("PDFファイル", "*.pdf"),
-                ("すべてのファイル", "*.*"),
-            ]
-            src = filedialog.askopenfilename(title=f"{f} — ファイル選択", filetypes=filetypes)
+            src = filedialog.askopenfilename(title=f"{f} — ファイル選択", filetypes=_MEDIA_FILETYPES)
             if not src:
                 return
             src_path = Path(src)
@@ -604,7 +775,7 @@ def build_ui(root: tk.Tk, config: dict) -> None:
             except Exception as e:
                 messagebox.showerror("コピーエラー", str(e))
                 return
-            update_media_tab(game)
+            _refresh()
 
         def _do_delete(fp: Path) -> None:
             if not messagebox.askokcancel("削除確認", f"削除しますか？\n{fp}"):
@@ -614,162 +785,209 @@ def build_ui(root: tk.Tk, config: dict) -> None:
             except Exception as e:
                 messagebox.showerror("削除エラー", str(e))
                 return
-            update_media_tab(game)
+            _refresh()
+
+        def _refresh() -> None:
+            invalidate_media_cache()
+            update_media_tab(game, force=True)
+
+        def _open_3dbox() -> None:
+            # box3d は Pillow と numpy を読み込むため、起動時ではなく初回使用時にインポートする
+            from src.media.box3d import open_3dbox_dialog
+            open_3dbox_dialog(
+                media_scroll_frame, file_map["covers"],
+                stem, media_path, title, system_var.get(), _refresh,
+            )
+
+        def _image_search(f: str) -> None:
+            _open_browser(
+                "https://www.google.com/search?tbm=isch&q=" + urllib.parse.quote(f"{title} {f}")
+            )
+
+        # 行のボタンは使い回すため、コマンドは partial で引数を束ねて差し替える
+        extra_commands = {
+            "marquees": ("covers", partial(
+                open_cover_crop_dialog, media_scroll_frame, file_map["covers"],
+                stem, media_path, title, _refresh,
+            )),
+            "3dboxes": ("covers", _open_3dbox),
+            "miximages": ("screenshots", partial(
+                open_miximage_dialog, media_scroll_frame, stem, media_path, title, _refresh,
+            )),
+        }
+
+        def _apply_thumb(r: dict, fp: Path, fn: str, future) -> None:
+            if epoch != _media_epoch[0]:
+                return  # 別のゲームに切り替わった後に届いた結果
+            try:
+                result = future.result()
+                if result is None:
+                    _set_media_status(r, "(巨大画像)", fg="#888", font=("Arial", 8),
+                                      on_click=partial(open_with_default_app, fp))
+                    return
+                photo = thumbnail_photo(result)
+            except Exception:
+                _set_media_status(r, "(読込失敗)", fg="#888", font=("Arial", 8))
+                return
+            _media_img_refs.append(photo)
+            _set_media_status(
+                r, image=photo, image_pad=True,
+                on_click=partial(open_fullsize_image, r["row"], fp, fn),
+            )
+
+        def _post_thumb(future, r: dict, fp: Path, fn: str) -> None:
+            # ワーカースレッドから呼ばれるため、Tk の操作はメインスレッドに回す
+            try:
+                root.after(0, _apply_thumb, r, fp, fn, future)
+            except (RuntimeError, tk.TclError):
+                pass  # ウィンドウが閉じられた後
 
-        for row_i, folder in enumerate(MEDIA_FOLDERS):
+        for r, folder in zip(_media_rows, MEDIA_FOLDERS):
             file_path = file_map[folder]
-            bg = "white" if row_i % 2 == 0 else "#f5f5f5"
-
-            row = tk.Frame(media_scroll_frame, bg=bg)
-            row.pack(fill="x")
-
-            # フォルダ名列
-            tk.Label(
-                row, text=folder, font=("Arial", 9), anchor="w",
-                width=14, bg=bg, fg="#444",
-            ).pack(side="left", padx=(10, 4), pady=6)
+            r["row"].pack(fill="x")
 
             if file_path is None:
-                tk.Label(row, text="-", font=("Arial", 10, "bold"), fg="#cc0000", bg=bg).pack(
-                    side="left", padx=4, pady=6,
-                )
-                btn_f = tk.Frame(row, bg=bg)
-                btn_f.pack(side="left", padx=(4, 0))
-                tk.Button(
-                    btn_f, text="URLからDL", font=("Arial", 8),
-                    command=lambda f=folder: open_url_download_dialog(
-                        media_scroll_frame, f, stem, media_path, title,
-                        lambda: update_media_tab(game)
-                    ),
-                ).pack(side="left", padx=2)
-                tk.Button(
-                    btn_f, text="ファイル選択...", font=("Arial", 8),
-                    command=lambda f=folder: _do_file_select(f),
-                ).pack(side="left", padx=2)
-                tk.Button(
-                    btn_f, text="検索", font=("Arial", 8),
-                    command=lambda f=folder: webbrowser.open(
-                        "https://www.google.com/search?tbm=isch&q="
-                        + urllib.parse.quote(f"{title} {f}")
-                    ),
-                ).pack(side="left", padx=2)
-                if folder == "marquees" and file_map.get("covers") is not None:
-                    tk.Button(
-                        btn_f, text="coverから切り出し", font=("Arial", 8),
-                        command=lambda: open_cover_crop_dialog(
-                            media_scroll_frame, file_map["covers"],
-                            stem, media_path, title,
-                            lambda: update_media_tab(game),
-                        ),
-                    ).pack(side="left", padx=2)
-                if folder == "3dboxes" and file_map.get("covers") is not None:
-                    tk.Button(
-                        btn_f, text="coverから3Dbox生成", font=("Arial", 8),
-                        command=lambda: open_3dbox_dialog(
-                            media_scroll_frame, file_map["covers"],
-                            stem, media_path, title, system_var.get(),
-                            lambda: update_media_tab(game),
-                        ),
-                    ).pack(side="left", padx=2)
-                if folder == "miximages" and file_map.get("screenshots") is not None:
-                    tk.Button(
-                        btn_f, text="miximage生成", font=("Arial", 8),
-                        command=lambda: open_miximage_dialog(
-                            media_scroll_frame, stem, media_path, title,
-                            lambda: update_media_tab(game),
-                        ),
-                    ).pack(side="left", padx=2)
+                r["btn_delete"].pack_forget()
+                _set_media_status(r, "-", fg="#cc0000", font=("Arial", 10, "bold"))
+                r["btn_f"].pack(side="left", padx=(4, 0))
+                r["btn_download"].config(command=partial(
+                    open_url_download_dialog, media_scroll_frame, folder, stem, media_path, title, _refresh,
+                ))
+                r["btn_file"].config(command=partial(_do_file_select, folder))
+                r["btn_search"].config(command=partial(_image_search, folder))
+                if r["btn_extra"] is not None:
+                    source, command = extra_commands[folder]
+                    if file_map.get(source) is not None:
+                        r["btn_extra"].config(command=command)
+                        r["btn_extra"].pack(side="left", padx=2)
+                    else:
+                        r["btn_extra"].pack_forget()
                 continue
 
-            tk.Button(
-                row, text="削除", font=("Arial", 8), fg="#cc0000",
-                command=lambda fp=file_path: _do_delete(fp),
-            ).pack(side="right", padx=(4, 8))
+            r["btn_f"].pack_forget()
+            r["btn_delete"].config(command=partial(_do_delete, file_path))
+            r["btn_delete"].pack(side="right", padx=(4, 8))
 
             suffix = file_path.suffix.lower()
 
-            if suffix in IMAGE_SUFFIXES and _PIL_OK:
-                # 画像サムネイル（クリックでフルサイズ表示）
-                try:
-                    img = Image.open(file_path)
-                    img.thumbnail((THUMB_W, THUMB_H), Image.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    _media_img_refs.append(photo)
-                    lbl_img = tk.Label(row, image=photo, bg=bg, cursor="hand2")
-                    lbl_img.pack(side="left", padx=(4, 8), pady=4)
-                    lbl_img.bind(
-                        "<Button-1>",
-                        lambda e, fp=file_path, fn=folder: open_fullsize_image(row, fp, fn),
-                    )
-                except Exception:
-                    tk.Label(row, text="(読込失敗)", font=("Arial", 8), fg="#888", bg=bg).pack(
-                        side="left", padx=4, pady=6,
-                    )
+            if suffix in IMAGE_SUFFIXES and pil_available():
+                # 画像サムネイル（クリックでフルサイズ表示）。デコードはワーカースレッドで行う
+                _set_media_status(r, "読込中...", fg="#888", font=("Arial", 8))
+                submit_thumbnail(file_path).add_done_callback(partial(_post_thumb, r=r, fp=file_path, fn=folder))
             elif suffix in IMAGE_SUFFIXES:
                 # PIL未使用時は○のみ
-                tk.Label(row, text="○ (画像)", font=("Arial", 9), fg="#007700", bg=bg).pack(
-                    side="left", padx=4, pady=6,
-                )
+                _set_media_status(r, "○ (画像)")
             elif suffix in VIDEO_SUFFIXES:
-                lbl_v = tk.Label(row, text="[動画] ▶", font=("Arial", 9), fg="#007700", bg=bg, cursor="hand2")
-                lbl_v.pack(side="left", padx=4, pady=6)
-                lbl_v.bind("<Button-1>", lambda e, fp=file_path: open_with_default_app(fp))
+                _set_media_status(r, "[動画] ▶", on_click=partial(open_with_default_app, file_path))
             elif suffix == ".pdf":
-                lbl_p = tk.Label(row, text="[PDF] ▶", font=("Arial", 9), fg="#0055cc", bg=bg, cursor="hand2")
-                lbl_p.pack(side="left", padx=4, pady=6)
-                lbl_p.bind("<Button-1>", lambda e, fp=file_path: open_with_default_app(fp))
-            else:
-                tk.Label(row, text="○", font=("Arial", 10, "bold"), fg="#007700", bg=bg).pack(
-                    side="left", padx=4, pady=6,
+                _set_media_status(
+                    r, "[PDF] ▶", fg="#0055cc",
+                    on_click=partial(open_with_default_app, file_path),
                 )
+            else:
+                _set_media_status(r, "○", font=("Arial", 10, "bold"))
 
+        # 行はすべて新しい表示に切り替わったので、前回の PhotoImage はもう参照されていない
+        _media_img_refs.clear()
         _on_media_scroll_frame_configure()
 
+    # メディアタブが非表示の間はサムネイルを作らず、表示時にまとめて描画する
+    _media_pending: dict = {"game": None, "dirty": False}
+
+    def request_media_tab(game: "ET.Element | None") -> None:
+        if notebook.select() == str(tab_media):
+            _media_pending["dirty"] = False
+            update_media_tab(game)
+        else:
+            _media_pending.update({"game": game, "dirty": True})
+
+    def _on_tab_changed(e=None) -> None:
+        if _media_pending["dirty"] and notebook.select() == str(tab_media):
+            _media_pending["dirty"] = False
+            update_media_tab(_media_pending["game"])
+
+    notebook.bind("<<NotebookTabChanged>>", _on_tab_changed)
+
+    def scan_rom_names(rom_base: str) -> set[str]:
+        """フォルダ直下のエントリ名を1回の scandir で集める（normcase 済み）。"""
+        try:
+            with os.scandir(rom_base) as it:
+                return {os.path.normcase(e.name) for e in it}
+        except OSError:
+            return set()
+
+    def rom_exists(rom_base: str, path_val: str, rom_dirs: dict[str, set[str]]) -> bool:
+        """<path> の ROM が存在するか。stat せず、フォルダごとの scan_rom_names の結果で判定する。
+
+        rom_dirs は rom_base からの相対フォルダ（直下は ""）→ エントリ名の集合。
+        初めて出てきたサブフォルダはここで走査して rom_dirs に追加する。
+        """
+        rel = os.path.normcase(os.path.normpath(path_val))
+        if os.path.isabs(rel) or rel in (os.curdir, os.pardir) or rel.startswith(os.pardir + os.sep):
+            return (Path(rom_base) / path_val).exists()  # rom_base の外を指すもの
+        head, name = os.path.split(rel)
+        names = rom_dirs.get(head)
+        if names is None:
+            names = rom_dirs[head] = scan_rom_names(os.path.join(rom_base, head))
+        return name in names
+
     def fill_form(game: ET.Element) -> None:
         path_label.config(text=get_field(game, "path"))
-        rom_base = resolve_paths(config, system_var.get())["rom_path"]
         path_val = get_field(game, "path")
-        if path_val and not (Path(rom_base) / path_val).exists():
+        if path_val and not rom_exists(state["rom_base"], path_val, state["rom_dirs"]):
             del_banner.grid()
         else:
             del_banner.grid_remove()
-        for key, widget in field_widgets.items():
-            val = get_field(game, key)
-            if isinstance(widget, TagInput):
-                widget.set_tags([t.strip() for t in val.split(",") if t.strip()])
-            elif isinstance(widget, DateInput):
-                widget.set_date_str(val)
-            elif isinstance(widget, tk.Text):
-                widget.delete("1.0", "end")
-                widget.insert("1.0", val)
-            else:
-                widget.delete(0, "end")
-                widget.insert(0, val)
-        update_media_tab(game)
+        for key, _get, set_value, _modified in form_ops:
+            set_value(get_field(game, key))
+        _dirty.clear()  # 上の書き込みで立った変更フラグは捨てる
+        request_media_tab(game)
+
+    def clear_form() -> None:
+        path_label.config(text="")
+        for _key, _get, set_value, _modified in form_ops:
+            set_value("")
 
     def flush_form(idx: int) -> None:
         if idx < 0 or idx >= len(state["games"]):
             return
+        # 何も編集されていなければ XML には触らない（一覧を移動するだけの場合）
+        changed = [(key, get_value) for key, get_value, _set, modified in form_ops if modified()]
+        if not changed:
+            return
         game = state["games"][idx]
-        for key, widget in field_widgets.items():
-            if isinstance(widget, TagInput):
-                val = ", ".join(widget.get_tags())
-            elif isinstance(widget, DateInput):
-                val = widget.get_date_str()
-            elif isinstance(widget, tk.Text):
-                val = widget.get("1.0", "end-1c").strip()
-            else:
-                val = widget.get().strip()
-            set_field(game, key, val)
+        for key, get_value in changed:
+            set_field(game, key, get_value())
         display = get_field(game, "name") or get_field(game, "path") or "(不明)"
-        listbox.delete(idx)
-        listbox.insert(idx, display)
-        rom_base = resolve_paths(config, system_var.get())["rom_path"]
+        if display != state["displays"][idx]:
+            state["displays"][idx] = display
+            listbox.delete(idx)
+            listbox.insert(idx, display)  # 入れ直した行は既定の文字色に戻る
+        elif all(key != "path" for key, _get in changed):
+            return  # 表示名も <path> も変わっていなければ一覧は触らない
         path_val = get_field(game, "path")
-        if path_val and not (Path(rom_base) / path_val).exists():
-            listbox.itemconfig(idx, fg="#cc0000")
+        missing = bool(path_val) and not rom_exists(state["rom_base"], path_val, state["rom_dirs"])
+        listbox.itemconfig(idx, fg="#cc0000" if missing else "")
+
+    def mark_form_saved() -> None:
+        """保存後、入力欄の変更フラグをすべて下ろす。"""
+        _dirty.clear()
+        for widget in field_widgets.values():
+            if isinstance(widget, (TagInput, DateInput)):
+                widget.mark_saved()
+            elif isinstance(widget, tk.Text):
+                widget.edit_modified(False)
+
+    _select_after_id = [None]
 
     def on_select(event=None) -> None:
+        """矢印キーの連打などで続けて届く選択変更をまとめ、落ち着いた選択だけを反映する。"""
+        if _select_after_id[0] is not None:
+            root.after_cancel(_select_after_id[0])
+        _select_after_id[0] = root.after(60, _apply_select)
+
+    def _apply_select() -> None:
+        _select_after_id[0] = None
         sel = listbox.curselection()
         if not sel:
             return
@@ -791,20 +1009,13 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         gamelist = state["root_elem"].find("gameList")
         if gamelist is not None:
             gamelist.remove(state["games"][idx])
+        _field_cache.pop(state["games"][idx], None)
         state["games"].pop(idx)
+        state["displays"].pop(idx)
         listbox.delete(idx)
         state["selected"] = -1
         del_banner.grid_remove()
-        path_label.config(text="")
-        for widget in field_widgets.values():
-            if isinstance(widget, tk.Text):
-                widget.delete("1.0", "end")
-            elif isinstance(widget, TagInput):
-                widget.set_tags([])
-            elif isinstance(widget, DateInput):
-                widget.set_date_str("")
-            else:
-                widget.delete(0, "end")
+        clear_form()
 
     btn_delete_entry.config(command=delete_entry)
 
@@ -820,18 +1031,19 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         ("Famitsu",    "https://www.famitsu.com/search/?q={query}"),
     ]
 
-    def open_search(url_template: str) -> None:
+    def open_search(prefix: str, suffix: str) -> None:
         name_widget = field_widgets.get("name")
         name = name_widget.get().strip() if isinstance(name_widget, tk.Entry) else ""
         if name:
-            query = urllib.parse.quote(f"{name} {system_var.get()}")
-            webbrowser.open(url_template.format(query=query))
+            _open_browser(prefix + urllib.parse.quote(f"{name} {system_var.get()}") + suffix)
 
     for _site_name, _tmpl in _search_sites:
+        # テンプレートはボタン生成時に {query} の前後で分割しておく
+        _prefix, _suffix = _tmpl.split("{query}")
         tk.Button(
             search_bar_frame, text=_site_name, font=("Arial", 9),
             relief="groove", padx=6, pady=2, cursor="hand2", bg="#f5f5f5",
-            command=lambda t=_tmpl: open_search(t),
+            command=lambda p=_prefix, sfx=_suffix: open_search(p, sfx),
         ).pack(side="left", padx=(0, 4), pady=5)
 
     tk.Frame(search_bar_frame, width=1, bg="#cccccc").pack(side="left", fill="y", padx=(4, 8), pady=6)
@@ -842,49 +1054,78 @@ def build_ui(root: tk.Tk, config: dict) -> None:
         ("Google翻訳", "https://translate.google.com/?sl=auto&tl=ja&text={text}&op=translate"),
     ]
 
-    def open_translate(url_template: str) -> None:
+    def open_translate(prefix: str, suffix: str) -> None:
         desc_widget = field_widgets.get("desc")
         text = desc_widget.get("1.0", "end-1c").strip() if isinstance(desc_widget, tk.Text) else ""
         if text:
-            webbrowser.open(url_template.format(text=urllib.parse.quote(text)))
+            _open_browser(prefix + urllib.parse.quote(text) + suffix)
 
     for _site_name, _tmpl in _translate_sites:
+        _prefix, _suffix = _tmpl.split("{text}")
         tk.Button(
             search_bar_frame, text=_site_name, font=("Arial", 9),
             relief="groove", padx=6, pady=2, cursor="hand2", bg="#f5f5f5",
-            command=lambda t=_tmpl: open_translate(t),
+            command=lambda p=_prefix, sfx=_suffix: open_translate(p, sfx),
         ).pack(side="left", padx=(0, 4), pady=5)
 
+    _load_seq = [0]  # load_file の呼び出しごとに増やし、追い越された読み込み結果を捨てる
+
     def load_file() -> None:
-        path = resolve_paths(config, system_var.get())["gamelist_path"]
+        """gamelist.xml の読み込みとパースをワーカースレッドで行い、結果をメインスレッドで反映する。"""
+        path = current_paths()["gamelist_path"]
         if not Path(path).exists():
             messagebox.showwarning("読み込みエラー", f"ファイルが見つかりません:\n{path}")
             return
-        try:
-            root_elem, games, decl = parse_gamelist(path)
-        except ET.ParseError as e:
-            messagebox.showerror("XMLエラー", f"XMLのパースに失敗しました:\n{e}")
+        rom_base = current_paths()["rom_path"]
+        _load_seq[0] += 1
+        seq = _load_seq[0]
+
+        def _worker() -> None:
+            try:
+                root_elem, games, decl = parse_gamelist(path)
+                rom_dirs = {"": scan_rom_names(rom_base)}
+                # 新しいツリーはまだどこからも参照されていないので、ここで一覧用の文字列も作る
+                displays: list[str] = []
+                missing: list[int] = []
+                for i, game in enumerate(games):
+                    path_val = game.findtext("path") or ""
+                    displays.append(game.findtext("name") or path_val or "(不明)")
+                    if path_val and not rom_exists(rom_base, path_val, rom_dirs):
+                        missing.append(i)
+            except Exception as e:
+                result = (e,)
+            else:
+                result = (None, root_elem, games, decl, rom_base, rom_dirs, displays, missing)
+            try:
+                root.after(0, _install, seq, *result)
+            except (RuntimeError, tk.TclError):
+                pass  # ウィンドウが閉じられた後
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _install(seq: int, error, root_elem=None, games=None, decl="", rom_base="", rom_dirs=None,
+                 displays=None, missing=None) -> None:
+        if seq != _load_seq[0]:
+            return  # 後から始めた読み込みがある
+        if isinstance(error, ET.ParseError):
+            messagebox.showerror("XMLエラー", f"XMLのパースに失敗しました:\n{error}")
             return
-        state.update({"root_elem": root_elem, "games": games, "decl": decl, "selected": -1})
+        if error is not None:
+            messagebox.showerror("読み込みエラー", str(error))
+            return
+        state.update({
+            "root_elem": root_elem, "games": games, "decl": decl, "selected": -1,
+            # ROM の有無は読み込み時のフォルダ一覧で判定する（機種を切り替えても読み込み直すまで変えない）
+            "rom_base": rom_base, "rom_dirs": rom_dirs, "displays": displays, "dirty_games": set(),
+        })
+        _field_cache.clear()
         listbox.delete(0, "end")
-        rom_base = resolve_paths(config, system_var.get())["rom_path"]
-        for i, game in enumerate(games):
-            display = get_field(game, "name") or get_field(game, "path") or "(不明)"
-            listbox.insert("end", display)
-            path_val = get_field(game, "path")
-            if path_val and not (Path(rom_base) / path_val).exists():
-                listbox.itemconfig(i, fg="#cc0000")
-        path_label.config(text="")
-        for widget in field_widgets.values():
-            if isinstance(widget, tk.Text):
-                widget.delete("1.0", "end")
-            elif isinstance(widget, TagInput):
-                widget.set_tags([])
-            elif isinstance(widget, DateInput):
-                widget.set_date_str("")
-            else:
-                widget.delete(0, "end")
-        update_media_tab(None)
+        # 1回の変数書き込みで全件を渡し、Tcl への呼び出しをゲーム数に比例させない
+        listbox_var.set(displays)
+        for i in missing:
+            listbox.itemconfig(i, fg="#cc0000")
+        clear_form()
+        request_media_tab(None)
         btn_media_check.config(state="normal")
 
     def save_file() -> None:
@@ -892,10 +1133,12 @@ def build_ui(root: tk.Tk, config: dict) -> None:
             messagebox.showwarning("保存エラー", "ファイルが読み込まれていません。")
             return
         flush_form(state["selected"])
-        path = resolve_paths(config, system_var.get())["gamelist_path"]
-        content = serialize_gamelist(state["root_elem"], state["decl"])
+        path = current_paths()["gamelist_path"]
+        content = serialize_gamelist(state["root_elem"], state["decl"], state["dirty_games"])
         try:
             save_gamelist_file(path, content, config.get("backup_max", 5))
+            state["dirty_games"] = set()  # 保存済みの要素はインデントも整っている
+            mark_form_saved()  # 保存した値を次の flush_form で書き直さない
             messagebox.showinfo("保存完了", "保存しました。")
         except Exception as e:
             messagebox.showerror("保存エラー", str(e))
@@ -1,63 +1,146 @@
+import copy
+import functools
 import json
+import os
 import platform
 import tkinter as tk
 from pathlib import Path
 
+try:
+    import orjson
+    _ORJSON_OK = True
+except ImportError:
+    _ORJSON_OK = False
+
 CONFIG_PATH       = Path(__file__).parent.parent.parent / "config.json"
-WINDOW_STATE_PATH = Path(__file__).parent.parent.parent / "window_state.json"
+WINDOW_STATE_PATH = Path(__file__).parent.parent.parent / "window_state.txt"
+_LEGACY_WINDOW_STATE_PATH = WINDOW_STATE_PATH.with_suffix(".json")  # 旧形式 {"geometry": ...}
 
 DEFAULT_GEOMETRY = "1100x700"
 
-MEDIA_FOLDERS = [
+MEDIA_FOLDERS = (
     "3dboxes", "backcovers", "covers", "fanart", "manuals",
     "marquees", "miximages", "physicalmedia", "screenshots",
     "titlescreens", "videos",
-]
+)
 
-IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tga"}
-VIDEO_SUFFIXES = {".mp4", ".mkv", ".avi", ".webm", ".mov", ".m4v"}
+IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tga"})
+VIDEO_SUFFIXES = frozenset({".mp4", ".mkv", ".avi", ".webm", ".mov", ".m4v"})
 
 THUMB_W, THUMB_H = 96, 72  # メディアタブのサムネイルサイズ
+THUMB_CACHE_DIR = Path(__file__).parent.parent.parent / ".thumb_cache"
+THUMB_CACHE_MAX = 2000  # キャッシュに残すサムネイルPNGの上限数
+
+
+def _json_loads(data: bytes):
+    """orjson があればそれで、なければ標準の json で UTF-8 のバイト列をパースする。"""
+    if _ORJSON_OK:
+        return orjson.loads(data.removeprefix(b"\xef\xbb\xbf"))
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """2スペースインデント・非ASCIIはそのままの JSON を UTF-8 バイト列で返す。"""
+    if _ORJSON_OK:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
 
 
 def load_config() -> dict:
-    with open(CONFIG_PATH, encoding="utf-8") as f:
-        return json.load(f)
+    """config.json を読み込む。(更新時刻, サイズ) が変わっていなければ前回のパース結果の複製を返す。
+
+    呼び出し側は返された dict を自由に書き換えてよい（キャッシュには影響しない）。
+    """
+    st = os.stat(CONFIG_PATH)
+    return copy.deepcopy(_load_config_cached(st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config_cached(mtime_ns: int, size: int) -> dict:
+    return _json_loads(CONFIG_PATH.read_bytes())
+
+
+def invalidate_config_cache() -> None:
+    _load_config_cached.cache_clear()
+
+
+def _replace_file(path: Path, data: bytes, fsync: bool = False) -> None:
+    """data を一時ファイルに書いてから path と置き換える。途中で落ちても path は壊れない。"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_config(config: dict) -> None:
+    """config.json を置き換えで書き戻し、load_config と discover_systems のキャッシュを破棄する。"""
+    _replace_file(CONFIG_PATH, _json_dumps(config), fsync=True)
+    invalidate_config_cache()
+    invalidate_systems_cache()  # environment や gamelist_base が変わっているかもしれない
 
 
 def load_window_state() -> str:
+    """保存済みのウィンドウジオメトリ文字列（例: "1100x700+10+10"）を返す。"""
     try:
-        with open(WINDOW_STATE_PATH, encoding="utf-8") as f:
-            return json.load(f).get("geometry", DEFAULT_GEOMETRY)
+        return WINDOW_STATE_PATH.read_text(encoding="utf-8").strip() or DEFAULT_GEOMETRY
     except FileNotFoundError:
+        pass
+    try:
+        return _json_loads(_LEGACY_WINDOW_STATE_PATH.read_bytes()).get("geometry", DEFAULT_GEOMETRY)
+    except (FileNotFoundError, ValueError):
         return DEFAULT_GEOMETRY
 
 
 def save_window_state(root: tk.Tk) -> None:
-    with open(WINDOW_STATE_PATH, "w", encoding="utf-8") as f:
-        json.dump({"geometry": root.geometry()}, f, indent=2)
+    """ジオメトリを一時ファイルに書いてから置き換える。終了時に落ちても壊れたファイルを残さない。"""
+    _replace_file(WINDOW_STATE_PATH, root.geometry().encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=None)
+def _default_environment() -> str:
+    """OS から環境名を判別する。platform.system() はプロセス中に変わらないので1回だけ呼ぶ。"""
+    return "windows" if platform.system() == "Windows" else "steam_deck"
 
 
 def detect_environment(config: dict) -> str:
     """config.json の environment を優先し、未設定の場合は OS を自動判別する。"""
     if env := config.get("environment"):
         return env
-    return "windows" if platform.system() == "Windows" else "steam_deck"
+    return _default_environment()
+
+
+# gamelist_base → 配下のシステムフォルダ名（ソート済み）。起動中にシステムが増減することはないため走査は1回
+_systems_cache: dict[str, tuple[str, ...]] = {}
 
 
-def discover_systems(config: dict) -> list[str]:
+def discover_systems(config: dict) -> tuple[str, ...]:
     """gamelist_base 配下のフォルダ名からシステム一覧を取得する。
     フォルダが見つからない場合は config.json の systems にフォールバックする。
+    キャッシュをそのまま返すため、結果は変更不可のタプル。
     """
     env = detect_environment(config)
     base = config.get(env, {}).get("gamelist_base", "")
     if base:
-        p = Path(base)
-        if p.is_dir():
-            dirs = sorted(d.name for d in p.iterdir() if d.is_dir())
-            if dirs:
-                return dirs
-    return config.get("systems", [])
+        dirs = _systems_cache.get(base)
+        if dirs is None:
+            try:
+                # DirEntry.is_dir() は readdir の結果を使うため、エントリごとの stat が不要
+                with os.scandir(base) as it:
+                    dirs = tuple(sorted(e.name for e in it if e.is_dir()))
+            except (FileNotFoundError, NotADirectoryError):
+                dirs = ()
+            _systems_cache[base] = dirs
+        if dirs:
+            return dirs
+    return tuple(config.get("systems", ()))
+
+
+def invalidate_systems_cache() -> None:
+    """discover_systems のキャッシュを破棄する（次回呼び出しでフォルダを走査し直す）。"""
+    _systems_cache.clear()
 
 
 def resolve_paths(config: dict, system: str) -> dict:
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import atexit
+import hashlib
+import importlib.util
+import os
+import queue
 import stat as _stat
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
-try:
-    import paramiko
-    _PARAMIKO_OK = True
-except ImportError:
-    _PARAMIKO_OK = False
+# paramiko は cryptography ごと読み込むため重い。起動時は有無だけ調べ、初めて接続するときにインポートする
+_PARAMIKO_OK = importlib.util.find_spec("paramiko") is not None
+paramiko = None
+
+
+def _load_paramiko() -> None:
+    global paramiko
+    if paramiko is None:
+        import paramiko
+
+# 1つのSSH接続上で並行に開くSFTPチャネル数（OpenSSH の MaxSessions 既定値 10 より十分小さく）
+_SFTP_WORKERS = 4
 
 
 def _sftp_makedirs(sftp: "paramiko.SFTPClient", remote_dir: str) -> None:
@@ -25,19 +38,168 @@ def _sftp_makedirs(sftp: "paramiko.SFTPClient", remote_dir: str) -> None:
         except FileNotFoundError:
             try:
                 sftp.mkdir(path)
-            except Exception:
-                pass  # 競合・権限エラーは無視
+            except OSError:
+                pass  # 権限エラーなどは、その後の put 側でファイルごとのエラーとして記録される
+
+
+def _up_to_date(
+    src_size: int, src_mtime: "float | None", dst_size: int, dst_mtime: "float | None",
+) -> bool:
+    """サイズが同じで更新時刻の差が1秒未満なら転送済みとみなす（rsync の quick check 相当）。
+
+    転送時に更新時刻を転送元に揃えておく前提。SFTP の更新時刻は秒単位のため1秒の幅を持たせる。
+    どちらかの更新時刻が分からない場合は転送する。
+    """
+    if src_size != dst_size or src_mtime is None or dst_mtime is None:
+        return False
+    return abs(dst_mtime - src_mtime) < 1
+
+
+def _remote_listings(sftp: "paramiko.SFTPClient", dirs) -> dict[str, "dict[str, paramiko.SFTPAttributes] | None"]:
+    """ディレクトリごとに listdir_attr を1回だけ呼び {dir: {name: 属性}} を返す。存在しないものは None。"""
+    listings: dict[str, "dict[str, paramiko.SFTPAttributes] | None"] = {}
+    for d in dirs:
+        if d in listings:
+            continue
+        try:
+            listings[d] = {a.filename: a for a in sftp.listdir_attr(d)}
+        except FileNotFoundError:
+            listings[d] = None
+    return listings
+
+
+def _local_listings(dirs) -> dict[Path, dict[str, os.stat_result]]:
+    """ローカルのディレクトリごとに scandir を1回だけ行い {dir: {name: stat}} を返す。"""
+    listings: dict[Path, dict[str, os.stat_result]] = {}
+    for d in dirs:
+        if d in listings:
+            continue
+        try:
+            with os.scandir(d) as it:
+                listings[d] = {e.name: e.stat() for e in it if e.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            listings[d] = {}
+    return listings
+
+
+def _run_parallel(
+    cl: "paramiko.SSHClient",
+    sftp: "paramiko.SFTPClient",
+    tasks: list,
+    job: Callable[["paramiko.SFTPClient", object], tuple[str, str]],
+    on_log: Callable[[str], None],
+    on_progress: Callable[[int], None],
+) -> dict[str, int]:
+    """tasks を複数の SFTP チャネルで並行に処理し、結果ごとの件数を返す。
+
+    SFTPClient はスレッド間で共有できないため、sftp に加えて同じ接続上へ
+    ワーカーごとのチャネルを開く（サーバーが追加のチャネルを拒否した場合は開けた数だけで処理する）。
+    sftp を含む全チャネルは処理後に閉じる。job(sftp, task) は ("ok" | "skipped" | "error", ログ行) を返す。
+    ログと進捗の通知はロックで1つずつ行う。
+    """
+    total = len(tasks)
+    pending: queue.SimpleQueue = queue.SimpleQueue()
+    for task in tasks:
+        pending.put(task)
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    lock = threading.Lock()
+
+    def worker(ch: "paramiko.SFTPClient") -> None:
+        try:
+            while True:
+                try:
+                    task = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    result, msg = job(ch, task)
+                except Exception as e:
+                    result, msg = "error", f"  ✗ {e}"
+                with lock:
+                    counts[result] += 1
+                    on_log(msg)
+                    on_progress(sum(counts.values()) * 100 // total)
+        finally:
+            ch.close()
+
+    sftps = [sftp]
+    for _ in range(min(_SFTP_WORKERS, total) - 1):
+        try:
+            sftps.append(cl.open_sftp())
+        except Exception:
+            break
+    threads = [threading.Thread(target=worker, args=(ch,), daemon=True) for ch in sftps]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+# (host, port, username, パスワードのハッシュ) → 接続済みの SSHClient。
+# テスト・転送・取得のたびに TCP 接続と鍵交換・認証をやり直さないよう、接続を使い回す
+_clients: dict[tuple[str, int, str, str], "paramiko.SSHClient"] = {}
+_clients_lock = threading.Lock()
+
+
+def _connect(host: str, port: int, username: str, password: str, timeout: float, fresh: bool = False) -> "paramiko.SSHClient":
+    """接続済みの SSHClient を返す。同じ接続先・認証情報の接続が生きていればそれを返す。
+
+    fresh=True の場合は既存の接続を閉じてから接続し直す。
+    """
+    _load_paramiko()
+    key = (host, port, username, hashlib.sha256(password.encode("utf-8")).hexdigest())
+    with _clients_lock:
+        cl = _clients.pop(key, None)
+        if cl is not None:
+            transport = cl.get_transport()
+            if not fresh and transport is not None and transport.is_active():
+                _clients[key] = cl
+                return cl
+            cl.close()
+        cl = paramiko.SSHClient()
+        cl.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        cl.connect(
+            hostname=host, port=port, username=username, password=password,
+            timeout=timeout, look_for_keys=False, allow_agent=False,
+        )
+        cl.get_transport().set_keepalive(30)  # 待機中に NAT などで切られないようにする
+        _clients[key] = cl
+        return cl
+
+
+def _open_sftp(host: str, port: int, username: str, password: str) -> tuple["paramiko.SSHClient", "paramiko.SFTPClient"]:
+    """使い回しの接続上に SFTP チャネルを開く。接続が切れていた場合は1回だけ接続し直す。"""
+    cl = _connect(host, port, username, password, timeout=15)
+    try:
+        return cl, cl.open_sftp()
+    except (paramiko.SSHException, OSError):
+        cl = _connect(host, port, username, password, timeout=15, fresh=True)
+        return cl, cl.open_sftp()
+
+
+def close_connections() -> None:
+    """使い回している SSH 接続をすべて閉じる。"""
+    with _clients_lock:
+        for cl in _clients.values():
+            cl.close()
+        _clients.clear()
+
+
+atexit.register(close_connections)
 
 
 def test_connection(host: str, port: int, username: str, password: str) -> None:
-    """SSH接続テスト。失敗時は例外を送出する。"""
-    cl = paramiko.SSHClient()
-    cl.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    cl.connect(
-        hostname=host, port=port, username=username, password=password,
-        timeout=10, look_for_keys=False, allow_agent=False,
-    )
-    cl.close()
+    """SSH接続テスト。失敗時は例外を送出する。
+
+    使い回している接続があればチャネルを1つ開いて生きているか確かめ、だめなら接続し直す。
+    成功した接続はその後の転送・取得で使い回す。
+    """
+    cl = _connect(host, port, username, password, timeout=10)
+    try:
+        cl.get_transport().open_session(timeout=10).close()
+    except (paramiko.SSHException, OSError):
+        _connect(host, port, username, password, timeout=10, fresh=True)
 
 
 def transfer_files(
@@ -54,13 +216,7 @@ def transfer_files(
     ok = skipped = errors = 0
 
     on_log(f"[{datetime.now().strftime('%H:%M:%S')}] 接続中: {host} ...")
-    cl = paramiko.SSHClient()
-    cl.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    cl.connect(
-        hostname=host, port=port, username=username, password=password,
-        timeout=15, look_for_keys=False, allow_agent=False,
-    )
-    sftp = cl.open_sftp()
+    cl, sftp = _open_sftp(host, port, username, password)
     on_log("  接続OK\n")
 
     total = len(tasks)
@@ -68,44 +224,43 @@ def transfer_files(
     if total == 0:
         on_log("転送するファイルがありません。")
         sftp.close()
-        cl.close()
         return ok, skipped, errors
 
-    for i, (lp, rp) in enumerate(tasks, 1):
-        if not overwrite:
-            try:
-                remote_size = sftp.stat(rp).st_size
-                if remote_size == lp.stat().st_size:
-                    on_log(f"  → スキップ: {lp.name}")
-                    skipped += 1
-                    on_progress(i * 100 // total)
-                    continue
-            except FileNotFoundError:
-                pass
-
-        _sftp_makedirs(sftp, rp.rsplit("/", 1)[0])
+    # ファイルごとに stat する代わりに、転送先ディレクトリごとに1回だけ一覧を取る
+    listings = _remote_listings(sftp, (rp.rsplit("/", 1)[0] for _, rp in tasks))
+    # 存在しない転送先ディレクトリは、並行転送の前にまとめて1回ずつ作っておく
+    for parent in sorted(d for d, listing in listings.items() if listing is None):
+        _sftp_makedirs(sftp, parent)
+
+    def put(sftp: "paramiko.SFTPClient", task: tuple[Path, str]) -> tuple[str, str]:
+        lp, rp = task
+        parent, name = rp.rsplit("/", 1)
+        listing = listings[parent]
+        st = lp.stat()
+        if listing is not None and not overwrite and (attr := listing.get(name)) is not None:
+            if _up_to_date(st.st_size, st.st_mtime, attr.st_size, attr.st_mtime):
+                return "skipped", f"  → スキップ: {lp.name}"
         try:
             sftp.put(str(lp), rp)
-            on_log(f"  ✓ {lp.name}")
-            ok += 1
         except Exception as ue:
-            on_log(f"  ✗ {lp.name}: {ue}")
-            errors += 1
-
-        on_progress(i * 100 // total)
+            return "error", f"  ✗ {lp.name}: {ue}"
+        try:
+            sftp.utime(rp, (st.st_atime, st.st_mtime))  # 次回の quick check 用に更新時刻を揃える
+        except OSError:
+            pass  # 転送自体は済んでいる。次回は再転送になるだけ
+        return "ok", f"  ✓ {lp.name}"
 
-    sftp.close()
-    cl.close()
-    return ok, skipped, errors
+    counts = _run_parallel(cl, sftp, tasks, put, on_log, on_progress)
+    return counts["ok"], counts["skipped"], counts["error"]
 
 
 def _collect_remote_files(
     sftp: "paramiko.SFTPClient",
     remote_dir: str,
     local_dir: Path,
-    tasks: list[tuple[str, Path]],
+    tasks: "list[tuple[str, Path, paramiko.SFTPAttributes]]",
 ) -> None:
-    """リモートディレクトリを再帰的に走査して (remote_path, local_path) をtasksに追記する。"""
+    """リモートディレクトリを再帰的に走査して (remote_path, local_path, 属性) をtasksに追記する。"""
     try:
         for entry in sftp.listdir_attr(remote_dir):
             rp = f"{remote_dir}/{entry.filename}"
@@ -113,7 +268,7 @@ def _collect_remote_files(
             if entry.st_mode and _stat.S_ISDIR(entry.st_mode):
                 _collect_remote_files(sftp, rp, lp, tasks)
             else:
-                tasks.append((rp, lp))
+                tasks.append((rp, lp, entry))
     except FileNotFoundError:
         pass
 
@@ -137,21 +292,14 @@ def pull_files(
     ok = skipped = errors = 0
 
     on_log(f"[{datetime.now().strftime('%H:%M:%S')}] 接続中: {host} ...")
-    cl = paramiko.SSHClient()
-    cl.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    cl.connect(
-        hostname=host, port=port, username=username, password=password,
-        timeout=15, look_for_keys=False, allow_agent=False,
-    )
-    sftp = cl.open_sftp()
+    cl, sftp = _open_sftp(host, port, username, password)
     on_log("  接続OK\n")
 
     # 単一ファイル指定分：リモートに存在するものだけ追加
-    tasks: list[tuple[str, Path]] = []
+    tasks: "list[tuple[str, Path, paramiko.SFTPAttributes]]" = []
     for rp, lp in file_tasks:
         try:
-            sftp.stat(rp)
-            tasks.append((rp, lp))
+            tasks.append((rp, lp, sftp.stat(rp)))
         except FileNotFoundError:
             on_log(f"  [スキップ] リモートに存在しません: {rp.rsplit('/', 1)[-1]}")
 
@@ -164,28 +312,29 @@ def pull_files(
     if total == 0:
         on_log("取得するファイルがありません。")
         sftp.close()
-        cl.close()
         return ok, skipped, errors
 
-    for i, (rp, lp) in enumerate(tasks, 1):
-        if not overwrite and lp.exists():
-            if sftp.stat(rp).st_size == lp.stat().st_size:
-                on_log(f"  → スキップ: {lp.name}")
-                skipped += 1
-                on_progress(i * 100 // total)
-                continue
+    # 取得済みかどうかは、列挙時の属性とローカルのディレクトリ一覧だけで判定する
+    local = _local_listings(lp.parent for _, lp, _ in tasks) if not overwrite else {}
 
+    def get(sftp: "paramiko.SFTPClient", task: "tuple[str, Path, paramiko.SFTPAttributes]") -> tuple[str, str]:
+        rp, lp, attr = task
+        st = local.get(lp.parent, {}).get(lp.name)
+        if st is not None and _up_to_date(attr.st_size, attr.st_mtime, st.st_size, st.st_mtime):
+            return "skipped", f"  → スキップ: {lp.name}"
         lp.parent.mkdir(parents=True, exist_ok=True)
         try:
+            # SFTPClient.get は内部で prefetch を使い、読み取り要求を先行して送る
             sftp.get(rp, str(lp))
-            on_log(f"  ✓ {lp.name}")
-            ok += 1
         except Exception as ue:
-            on_log(f"  ✗ {lp.name}: {ue}")
-            errors += 1
-
-        on_progress(i * 100 // total)
+            return "error", f"  ✗ {lp.name}: {ue}"
+        if attr.st_mtime is not None:
+            atime = attr.st_atime if attr.st_atime is not None else attr.st_mtime
+            try:
+                os.utime(lp, (atime, attr.st_mtime))  # 次回の quick check 用に更新時刻を揃える
+            except OSError:
+                pass  # 取得自体は済んでいる。次回は再取得になるだけ
+        return "ok", f"  ✓ {lp.name}"
 
-    sftp.close()
-    cl.close()
-    return ok, skipped, errors
+    counts = _run_parallel(cl, sftp, tasks, get, on_log, on_progress)
+    return counts["ok"], counts["skipped"], counts["error"]
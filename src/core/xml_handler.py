@@ -1,41 +1,194 @@
-import re
+import copy
+import heapq
+import os
 import shutil
-import xml.etree.ElementTree as ET
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    import lxml.etree as ET
+    _LXML_OK = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _LXML_OK = False
+
+
+# gamelist.xml は数MBになることが多いため、read/feed の呼び出し回数が少なくなる大きめの単位で読む
+_READ_CHUNK = 1024 * 1024
+_DEFAULT_DECL = '<?xml version="1.0"?>'
+
+# path → ((st_mtime_ns, st_size), 未編集の_root_要素, XML宣言)
+_GAMELIST_CACHE_MAX = 4
+_gamelist_cache: dict[str, tuple[tuple[int, int], ET.Element, str]] = {}
+_gamelist_cache_lock = threading.Lock()  # 読み込みはワーカースレッド、破棄は Tk スレッドから行われる
+
+
+def _new_parser() -> "ET.XMLParser":
+    """lxml が使える場合は C 実装のパーサを、なければ標準ライブラリのパーサを返す。"""
+    if _LXML_OK:
+        return ET.XMLParser(huge_tree=True, remove_blank_text=False)
+    return ET.XMLParser()
+
+
+def _split_decl(head: bytes) -> tuple[str, bytes]:
+    """先頭チャンクから XML宣言 を切り出し (宣言, 残りのバイト列) を返す。"""
+    if head.startswith(b"\xef\xbb\xbf"):
+        head = head[3:]
+    if head.startswith(b"<?xml"):
+        end = head.find(b"?>")
+        if end != -1:
+            return head[:end + 2].decode("utf-8"), head[end + 2:]
+    return _DEFAULT_DECL, head
+
+
+def _parse_gamelist_file(path: str) -> tuple[ET.Element, str]:
+    """gamelist.xml を読み込んで (_root_要素, XML宣言) を返す。
+
+    ES-DE の gamelist.xml は <alternativeEmulator> と <gameList> の
+    2トップレベル要素を持つため、ファイルをチャンク単位で読みながら
+    <_root_> で挟んでパーサに流し込む（全文を文字列として保持しない）。
+    """
+    parser = _new_parser()
+    with open(path, "rb") as f:
+        decl, head = _split_decl(f.read(_READ_CHUNK))
+        parser.feed(b"<_root_>")
+        parser.feed(head)
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+            parser.feed(chunk)
+    parser.feed(b"</_root_>")
+    return parser.close(), decl
+
+
+def _stat_key(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cache_put(path: str, key: tuple[int, int], pristine: ET.Element, decl: str) -> None:
+    """未編集のツリーをキャッシュに入れる。上限を超えたら最も長く使われていないものを捨てる。"""
+    with _gamelist_cache_lock:
+        _gamelist_cache.pop(path, None)
+        if len(_gamelist_cache) >= _GAMELIST_CACHE_MAX:
+            del _gamelist_cache[next(iter(_gamelist_cache))]
+        _gamelist_cache[path] = (key, pristine, decl)
 
 
 def parse_gamelist(path: str) -> tuple[ET.Element, list[ET.Element], str]:
     """gamelist.xml をパースし (_root_要素, game要素リスト, XML宣言) を返す。
 
-    ES-DE の gamelist.xml は <alternativeEmulator> と <gameList> の
-    2トップレベル要素を持つため、_root_ でラップして標準パーサで処理する。
+    (更新時刻, サイズ) が前回と同じならファイルを読み直さず、キャッシュ済みの
+    ツリーの複製を返す。呼び出し側は返されたツリーを自由に編集してよい。
     """
-    content = Path(path).read_text(encoding="utf-8")
-    decl_match = re.match(r'<\?xml[^?]*\?>', content)
-    decl = decl_match.group(0) if decl_match else '<?xml version="1.0"?>'
-    body = re.sub(r'<\?xml[^?]*\?>\s*', '', content).strip()
-    root_elem = ET.fromstring(f'<_root_>{body}</_root_>')
+    key = _stat_key(path)
+    with _gamelist_cache_lock:
+        cached = _gamelist_cache.pop(path, None)
+        if cached is not None and cached[0] == key:
+            _gamelist_cache[path] = cached  # 末尾に入れ直して最近使ったものとして扱う
+        else:
+            cached = None
+    # キャッシュ内のツリーは編集されないため、複製はロックの外で行ってよい
+    if cached is None:
+        root_elem, decl = _parse_gamelist_file(path)
+        _cache_put(path, key, copy.deepcopy(root_elem), decl)
+    else:
+        root_elem, decl = copy.deepcopy(cached[1]), cached[2]
     gamelist = root_elem.find('gameList')
     games = gamelist.findall('game') if gamelist is not None else []
     return root_elem, games, decl
 
 
-def serialize_gamelist(root_elem: ET.Element, decl: str) -> str:
-    parts = [decl]
+def invalidate_gamelist_cache(path: "str | None" = None) -> None:
+    """parse_gamelist のキャッシュを破棄する。path 省略時は全件。"""
+    with _gamelist_cache_lock:
+        if path is None:
+            _gamelist_cache.clear()
+        else:
+            _gamelist_cache.pop(path, None)
+
+
+def _indent_toplevel(child: ET.Element, dirty: "set | None") -> None:
+    """トップレベル要素をタブインデントに整える。
+
+    dirty が渡され、かつ gameList が既にタブインデント済み（ES-DE や本ツールが書いたファイル）の
+    場合は、編集された <game> の中だけを ET.indent し直し、残りは要素間の改行だけを揃える。
+    """
+    games = list(child) if child.tag == "gameList" else []
+    if dirty is None or not games or child.text != "\n\t":
+        ET.indent(child, space='\t')
+        return
+    for game in games:
+        game.tail = "\n\t"
+        if game in dirty:
+            ET.indent(game, space='\t', level=1)
+    games[-1].tail = "\n"
+
+
+def serialize_gamelist(root_elem: ET.Element, decl: str, dirty: "set | None" = None) -> Iterator[bytes]:
+    """_root_ 配下のトップレベル要素をタブインデントで書き出す UTF-8 のバイト列を順に返す。
+
+    インデントは各トップレベル要素に対して行う（_root_ に対して ET.indent を呼ぶと
+    子要素が1段深くインデントされ、負の level も指定できないため）。
+    dirty に編集した <game> 要素の集合を渡すと、それ以外の <game> は再インデントしない。
+    要素ごとのバイト列をそのまま書き込めるよう、文書全体を1つに連結しない。
+    """
+    yield decl.encode("utf-8")
     for child in root_elem:
         child.tail = None
-        ET.indent(child, space='\t')
-        parts.append(ET.tostring(child, encoding='unicode'))
-    return '\n'.join(parts) + '\n'
+        _indent_toplevel(child, dirty)
+        yield b'\n'
+        yield ET.tostring(child, encoding='utf-8', xml_declaration=False)
+    yield b'\n'
+
+
+def _write_all(path: Path, chunks: Iterable[bytes]) -> None:
+    """chunks を1つのファイルディスクリプタに順に書き切り、fsync してから閉じる。"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        for chunk in chunks:
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
-def save_gamelist_file(path: str, content: str, backup_max: int) -> None:
+def save_gamelist_file(path: str, content: Iterable[bytes], backup_max: int) -> None:
+    """gamelist.xml を保存する。旧ファイルはタイムスタンプ付き .bak として残す。
+
+    content は serialize_gamelist の戻り値のようなバイト列の列。
+    新しい内容は一時ファイルに書いてから os.replace で差し替えるため、
+    書き込み途中で失敗しても元の gamelist.xml は壊れない。
+    """
     p = Path(path)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     bak = p.parent / f"{p.name}.{timestamp}.bak"
-    shutil.copy2(p, bak)
-    backups = sorted(p.parent.glob(f"{p.name}.*.bak"))
-    for old in backups[:-backup_max]:
-        old.unlink()
-    p.write_text(content, encoding="utf-8")
+    tmp = p.parent / f"{p.name}.tmp"
+    _write_all(tmp, content)
+    try:
+        # 同一ファイルシステムならハードリンクでコピーなしにバックアップする
+        os.link(p, bak)
+    except OSError:
+        # exFAT/FAT の SDカードなどハードリンク非対応、または同名 .bak が既にある場合
+        shutil.copy2(p, bak)
+    os.replace(tmp, p)
+    _prune_backups(p, backup_max)
+    invalidate_gamelist_cache(path)
+
+
+def _prune_backups(p: Path, backup_max: int) -> None:
+    """p の .bak を新しい順に backup_max 件だけ残し、古いものを削除する。
+
+    ファイル名のタイムスタンプ部分は辞書順 = 時系列順なので、名前で比較する。
+    """
+    if backup_max <= 0:
+        return
+    prefix = f"{p.name}."
+    with os.scandir(p.parent) as it:
+        backups = [e for e in it if e.name.startswith(prefix) and e.name.endswith(".bak")]
+    excess = len(backups) - backup_max
+    if excess > 0:
+        for old in heapq.nsmallest(excess, backups, key=lambda e: e.name):
+            os.unlink(old.path)
@@ -4,12 +4,20 @@
 背表紙の装飾（テキスト、ケース枠など）はプラットフォーム固有モジュールに委譲する。
 """
 
+import functools
+
 try:
     from PIL import Image, ImageFilter, ImageDraw
     _PIL_OK = True
 except ImportError:
     _PIL_OK = False
 
+try:
+    import numpy as np
+    _NUMPY_OK = True
+except ImportError:
+    _NUMPY_OK = False
+
 
 def find_perspective_coeffs(
     src_points: list[tuple[float, float]],
@@ -18,16 +26,56 @@ def find_perspective_coeffs(
     """入力画像の4点(src)を出力画像の4点(dst)にマッピングする
     Pillow Image.transform(PERSPECTIVE) 用の8係数を返す。
     """
-    import numpy as np
-    A = []
-    B = []
-    for (sx, sy), (dx, dy) in zip(src_points, dst_points):
-        A.append([dx, dy, 1, 0, 0, 0, -sx * dx, -sx * dy])
-        A.append([0, 0, 0, dx, dy, 1, -sy * dx, -sy * dy])
-        B.append(sx)
-        B.append(sy)
-    res = np.linalg.lstsq(np.array(A, dtype=float), np.array(B, dtype=float), rcond=None)[0]
-    return list(res)
+    A = np.zeros((8, 8))
+    B = np.empty(8)
+    for i, ((sx, sy), (dx, dy)) in enumerate(zip(src_points, dst_points)):
+        A[2 * i] = (dx, dy, 1, 0, 0, 0, -sx * dx, -sx * dy)
+        A[2 * i + 1] = (0, 0, 0, dx, dy, 1, -sy * dx, -sy * dy)
+        B[2 * i] = sx
+        B[2 * i + 1] = sy
+    # 4点対応なら連立方程式は正方行列になるため、最小二乗（SVD）ではなく LU 分解で解く
+    return np.linalg.solve(A, B).tolist()
+
+
+@functools.lru_cache(maxsize=128)
+def _layout(
+    cw: int, ch: int, spine_ratio: float, angle_pct: float, canvas_w: int, canvas_h: int,
+) -> tuple[int, int, int, tuple[float, ...], tuple[float, ...]]:
+    """カバーサイズと形状パラメータから (背表紙幅, 出力幅, 出力高さ, 正面の係数, 背表紙の係数) を求める。
+
+    プレビューではスライダーの値が行き来するため、同じ組み合わせの射影係数は解き直さない。
+    """
+    spine_w = max(4, int(cw * spine_ratio))
+    front_w = int(cw * (1.0 - angle_pct * 0.55))
+    shrink = int(ch * angle_pct * 0.22)
+    spine_drop = int(spine_w * angle_pct * 1.8)
+
+    margin = int(cw * 0.04)
+    out_w = canvas_w or (front_w + spine_w + margin)
+    out_h = canvas_h or (ch + spine_drop + margin)
+
+    fl_x = spine_w
+    fl_y = margin
+
+    front_src = [(0, 0), (cw, 0), (cw, ch), (0, ch)]
+    front_dst = [
+        (fl_x, fl_y),
+        (fl_x + front_w, fl_y + shrink),
+        (fl_x + front_w, fl_y + ch - shrink),
+        (fl_x, fl_y + ch),
+    ]
+    spine_src = [(0, 0), (spine_w, 0), (spine_w, ch), (0, ch)]
+    spine_dst = [
+        (0, fl_y + spine_drop),
+        (fl_x, fl_y),
+        (fl_x, fl_y + ch),
+        (0, fl_y + ch - spine_drop),
+    ]
+    return (
+        spine_w, out_w, out_h,
+        tuple(find_perspective_coeffs(front_src, front_dst)),
+        tuple(find_perspective_coeffs(spine_src, spine_dst)),
+    )
 
 
 def generate_3dbox(
@@ -60,66 +108,42 @@ def generate_3dbox(
         decorate_spine:  背表紙画像を装飾するコールバック (spine_img, spine_text, system, font_path) -> None
     Returns:
         透明背景の3DボックスPNG用RGBA画像
+    Raises:
+        ImportError: NumPy がインストールされていない場合
     """
+    if not _NUMPY_OK:
+        raise ImportError("3Dボックス生成には NumPy が必要です（pip install numpy）")
     cover = cover_img.convert("RGBA")
     cw, ch = cover.size
-    spine_w = max(4, int(cw * spine_ratio))
 
     if decorate_cover:
         decorate_cover(cover, ch)
 
-    front_w = int(cw * (1.0 - angle_pct * 0.55))
-    shrink = int(ch * angle_pct * 0.22)
-    spine_drop = int(spine_w * angle_pct * 1.8)
-
-    margin = int(cw * 0.04)
-    out_w = canvas_w or (front_w + spine_w + margin)
-    out_h = canvas_h or (ch + spine_drop + margin)
-
-    fl_x = spine_w
-    fl_y = margin
-
-    front_src = [(0, 0), (cw, 0), (cw, ch), (0, ch)]
-    front_dst = [
-        (fl_x, fl_y),
-        (fl_x + front_w, fl_y + shrink),
-        (fl_x + front_w, fl_y + ch - shrink),
-        (fl_x, fl_y + ch),
-    ]
-    coeffs_front = find_perspective_coeffs(front_src, front_dst)
+    spine_w, out_w, out_h, coeffs_front, coeffs_spine = _layout(
+        cw, ch, spine_ratio, angle_pct, canvas_w, canvas_h,
+    )
     front_warped = cover.transform(
         (out_w, out_h), Image.PERSPECTIVE, coeffs_front, Image.BICUBIC,
     )
 
     # 背表紙ベース画像（カバー左端の平均色からグラデーション生成）
     spine_avg = cover.crop((0, 0, max(1, cw // 10), ch))
-    spine_pixels = list(spine_avg.getdata())
-    r = sum(p[0] for p in spine_pixels) // len(spine_pixels)
-    g = sum(p[1] for p in spine_pixels) // len(spine_pixels)
-    b = sum(p[2] for p in spine_pixels) // len(spine_pixels)
+    spine_rgb = np.asarray(spine_avg)[..., :3].reshape(-1, 3)
+    r, g, b = (int(v) for v in spine_rgb.sum(axis=0, dtype=np.int64) // len(spine_rgb))
     dark = (max(0, int(r * 0.45)), max(0, int(g * 0.45)), max(0, int(b * 0.45)))
     light = (max(0, int(r * 0.70)), max(0, int(g * 0.70)), max(0, int(b * 0.70)))
 
-    spine_img = Image.new("RGBA", (spine_w, ch), (*light, 255))
-    for x in range(spine_w):
-        t = x / max(1, spine_w - 1)
-        cr = int(dark[0] + (light[0] - dark[0]) * t)
-        cg = int(dark[1] + (light[1] - dark[1]) * t)
-        cb = int(dark[2] + (light[2] - dark[2]) * t)
-        for y in range(ch):
-            spine_img.putpixel((x, y), (cr, cg, cb, 255))
+    # 左(dark)→右(light)の1行分を作り、縦方向に並べる（putpixel で1画素ずつ塗らない）
+    t = np.arange(spine_w) / max(1, spine_w - 1)
+    dark_a = np.array(dark, dtype=np.float64)
+    row = np.empty((spine_w, 4), dtype=np.uint8)
+    row[:, :3] = dark_a + (np.array(light, dtype=np.float64) - dark_a) * t[:, None]
+    row[:, 3] = 255
+    spine_img = Image.fromarray(np.ascontiguousarray(np.broadcast_to(row, (ch, spine_w, 4))))
 
     if decorate_spine:
         decorate_spine(spine_img, spine_text, system, font_path)
 
-    spine_src = [(0, 0), (spine_w, 0), (spine_w, ch), (0, ch)]
-    spine_dst = [
-        (0, fl_y + spine_drop),
-        (fl_x, fl_y),
-        (fl_x, fl_y + ch),
-        (0, fl_y + ch - spine_drop),
-    ]
-    coeffs_spine = find_perspective_coeffs(spine_src, spine_dst)
     spine_warped = spine_img.transform(
         (out_w, out_h), Image.PERSPECTIVE, coeffs_spine, Image.BICUBIC,
     )
@@ -127,15 +151,13 @@ def generate_3dbox(
     result = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 0))
 
     if shadow:
+        # 両レイヤーの不透明部分を、ずらした位置に1枚の黒いキャンバスへ重ねる
         shadow_layer = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 0))
         shadow_offset = 6
-        for layer in [spine_warped, front_warped]:
-            alpha = layer.split()[3]
-            sh = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 80))
-            sh.putalpha(alpha)
-            shifted = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 0))
-            shifted.paste(sh, (shadow_offset, shadow_offset))
-            shadow_layer = Image.alpha_composite(shadow_layer, shifted)
+        box = (shadow_offset, shadow_offset, out_w, out_h)
+        for layer in (spine_warped, front_warped):
+            alpha = layer.getchannel("A").crop((0, 0, out_w - shadow_offset, out_h - shadow_offset))
+            shadow_layer.paste((0, 0, 0, 255), box, mask=alpha)
         shadow_layer = shadow_layer.filter(ImageFilter.GaussianBlur(radius=4))
         result = Image.alpha_composite(result, shadow_layer)
 
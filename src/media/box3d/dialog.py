@@ -1,5 +1,6 @@
 """3Dボックス生成ダイアログ（プレビュー付き）。"""
 
+import threading
 import tkinter as tk
 from pathlib import Path
 from tkinter import messagebox
@@ -122,48 +123,80 @@ def open_3dbox_dialog(
                 fill = "#ffffff" if (x // size + y // size) % 2 == 0 else "#cccccc"
                 canvas.create_rectangle(x, y, x + size, y + size, fill=fill, outline="")
 
+    # 背景は1回だけ描き、プレビューの更新では "preview" タグの項目だけを差し替える
+    _draw_checker(preview_canvas, PREVIEW_MAX, PREVIEW_MAX)
+
     generated_img_holder: list = [None]
     _preview_after_id: list = [None]
+    _preview_seq = [0]  # 設定が変わるたびに増やし、古い設定での生成結果を捨てる
+    _preview_busy = [False]  # ワーカースレッドで生成中か（同時に1つだけ走らせる）
 
     def update_preview(*_) -> None:
+        _preview_seq[0] += 1
+        btn_save.config(state="disabled")  # 表示中のプレビューはもう現在の設定と一致しない
         if _preview_after_id[0] is not None:
             dlg.after_cancel(_preview_after_id[0])
         _preview_after_id[0] = dlg.after(150, _do_update_preview)
 
     def _do_update_preview() -> None:
         _preview_after_id[0] = None
-        try:
-            img3d = generate_3dbox(
-                orig_img,
-                spine_ratio=spine_var.get(),
-                angle_pct=angle_var.get(),
-                shadow=shadow_var.get(),
-                spine_text=spine_text_var.get(),
-                system=system,
-                decorate_cover=decorate_cover,
-                decorate_spine=decorate_spine,
-            )
-            generated_img_holder[0] = img3d
+        if _preview_busy[0]:
+            return  # 生成中の結果が届いたときに最新の設定で開始し直す
+        _preview_busy[0] = True
+        # Tk 変数はメインスレッドで読んでからワーカーに渡す
+        params = dict(
+            spine_ratio=spine_var.get(),
+            angle_pct=angle_var.get(),
+            shadow=shadow_var.get(),
+            spine_text=spine_text_var.get(),
+            system=system,
+            decorate_cover=decorate_cover,
+            decorate_spine=decorate_spine,
+        )
+        threading.Thread(target=_generate, args=(_preview_seq[0], params), daemon=True).start()
 
+    def _generate(seq: int, params: dict) -> None:
+        """ワーカースレッドで3Dボックスとプレビュー用の縮小画像を作る。"""
+        try:
+            img3d = generate_3dbox(orig_img, **params)
             pw, ph = img3d.size
             scale = min(PREVIEW_MAX / pw, PREVIEW_MAX / ph, 1.0)
             dw = max(1, int(pw * scale))
             dh = max(1, int(ph * scale))
-            disp = img3d.resize((dw, dh), Image.LANCZOS) if scale < 1.0 else img3d.copy()
-            photo = ImageTk.PhotoImage(disp)
-
-            preview_canvas.delete("all")
-            _draw_checker(preview_canvas, PREVIEW_MAX, PREVIEW_MAX)
-            preview_canvas.create_image(
-                PREVIEW_MAX // 2, PREVIEW_MAX // 2, anchor="center", image=photo,
-            )
-            preview_canvas._photo_ref = photo
+            disp = img3d.resize((dw, dh), Image.LANCZOS) if scale < 1.0 else img3d
+            result = (img3d, disp)
         except Exception:
-            preview_canvas.delete("all")
+            result = None
+        try:
+            dlg.after(0, _apply_preview, seq, result)
+        except (RuntimeError, tk.TclError):
+            pass  # ダイアログが閉じられた
+
+    def _apply_preview(seq: int, result: "tuple | None") -> None:
+        if not dlg.winfo_exists():
+            return  # 生成中にダイアログが閉じられた
+        _preview_busy[0] = False
+        if seq != _preview_seq[0]:
+            # 生成中に設定が変わった。待機中の after がなければここで開始する
+            if _preview_after_id[0] is None:
+                _do_update_preview()
+            return
+        preview_canvas.delete("preview")
+        if result is None:
+            generated_img_holder[0] = None
             preview_canvas.create_text(
                 PREVIEW_MAX // 2, PREVIEW_MAX // 2,
-                text="(生成エラー)", fill="#cc0000", font=("Arial", 10),
+                text="(生成エラー)", fill="#cc0000", font=("Arial", 10), tags="preview",
             )
+            return
+        img3d, disp = result
+        generated_img_holder[0] = img3d
+        btn_save.config(state="normal")
+        photo = ImageTk.PhotoImage(disp)
+        preview_canvas.create_image(
+            PREVIEW_MAX // 2, PREVIEW_MAX // 2, anchor="center", image=photo, tags="preview",
+        )
+        preview_canvas._photo_ref = photo
 
     spine_var.trace_add("write", update_preview)
     angle_var.trace_add("write", update_preview)
@@ -193,9 +226,11 @@ def open_3dbox_dialog(
         dlg.destroy()
         on_success()
 
-    tk.Button(
-        footer, text="保存", font=("Arial", 9), width=14, command=do_save,
-    ).pack(side="left", padx=(12, 6))
+    # 保存ボタンは最新の設定でのプレビューが表示されている間だけ押せる
+    btn_save = tk.Button(
+        footer, text="保存", font=("Arial", 9), width=14, command=do_save, state="disabled",
+    )
+    btn_save.pack(side="left", padx=(12, 6))
     tk.Button(
         footer, text="閉じる", font=("Arial", 9), width=8, command=dlg.destroy,
     ).pack(side="right", padx=12)
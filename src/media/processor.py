@@ -1,28 +1,42 @@
+import concurrent.futures
+import functools
+import hashlib
+import heapq
 import mimetypes
 import os
 import platform
+import shutil
 import subprocess
+import tempfile
+import threading
 import urllib.parse
-import urllib.request
-import urllib.error
-import webbrowser
-import xml.etree.ElementTree as ET
 import tkinter as tk
 from pathlib import Path
 from tkinter import messagebox, filedialog
 
-try:
-    from PIL import Image, ImageTk
-    _PIL_OK = True
-except ImportError:
-    _PIL_OK = False
-
 from src.core.config_manager import (
     MEDIA_FOLDERS, IMAGE_SUFFIXES, VIDEO_SUFFIXES, THUMB_W, THUMB_H,
+    THUMB_CACHE_DIR, THUMB_CACHE_MAX,
     resolve_paths,
 )
-from src.media.logo_extractor import is_available as _ai_logo_available
-from src.media.miximage import generate_miximage, CANVAS_W, CANVAS_H
+from src.core.xml_handler import ET
+
+# Pillow は起動を軽くするため、画像を扱う直前に pil_available() で読み込む
+Image = None
+ImageTk = None
+_pil_ok: "bool | None" = None
+
+
+def pil_available() -> bool:
+    """Pillow を初回呼び出し時にインポートし、利用可能かどうかを返す。"""
+    global Image, ImageTk, _pil_ok
+    if _pil_ok is None:
+        try:
+            from PIL import Image, ImageTk
+            _pil_ok = True
+        except ImportError:
+            _pil_ok = False
+    return _pil_ok
 
 
 def get_rom_stem(path_val: str) -> str:
@@ -32,27 +46,193 @@ def get_rom_stem(path_val: str) -> str:
     return Path(path_val).stem
 
 
-def check_media_for_game(media_path: str, rom_stem: str) -> dict[str, bool]:
-    """11種のメディアフォルダそれぞれに rom_stem.* が存在するか確認する。"""
-    base = Path(media_path)
-    return {
-        folder: bool(list((base / folder).glob(f"{rom_stem}.*")))
-        for folder in MEDIA_FOLDERS
-    }
+# メディアフォルダのパス → (st_mtime_ns, {stem: Path})。ファイルの追加・削除でフォルダの更新時刻が変わる
+_MEDIA_DIR_INDEX_MAX = 64  # 11フォルダ × 数機種ぶん
+_media_dir_index: dict[str, tuple[int, dict[str, Path]]] = {}
 
 
-def find_media_files(media_path: str, rom_stem: str) -> dict[str, "Path | None"]:
-    """各メディアフォルダの最初にマッチしたファイルパスを返す。なければ None。"""
-    base = Path(media_path)
-    result: dict[str, "Path | None"] = {}
-    for folder in MEDIA_FOLDERS:
-        folder_path = base / folder
-        if folder_path.is_dir():
-            matches = list(folder_path.glob(f"{rom_stem}.*"))
-            result[folder] = matches[0] if matches else None
-        else:
-            result[folder] = None
-    return result
+def _folder_index(folder_path: str) -> dict[str, Path]:
+    """フォルダ内のファイルを {normcase(stem): Path} にした索引を返す（読み取り専用）。
+
+    フォルダの更新時刻が前回と同じなら走査せずキャッシュを返す。
+    同じ stem のファイルが複数ある場合は最初に見つかったものを採用する。
+    """
+    try:
+        mtime_ns = os.stat(folder_path).st_mtime_ns
+    except OSError:
+        _media_dir_index.pop(folder_path, None)
+        return {}
+    cached = _media_dir_index.get(folder_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    entries: dict[str, Path] = {}
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                if entry.is_file():
+                    stem = os.path.normcase(os.path.splitext(entry.name)[0])
+                    entries.setdefault(stem, Path(entry.path))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    if len(_media_dir_index) >= _MEDIA_DIR_INDEX_MAX and folder_path not in _media_dir_index:
+        del _media_dir_index[next(iter(_media_dir_index))]
+    _media_dir_index[folder_path] = (mtime_ns, entries)
+    return entries
+
+
+def index_media(media_path: str) -> dict[str, dict[str, Path]]:
+    """11種のメディアフォルダの {folder: {stem: Path}} の索引を返す（読み取り専用）。
+
+    ゲームごとに glob を繰り返す代わりに、索引を一度作って辞書引きで判定する。
+    """
+    return {folder: _folder_index(os.path.join(media_path, folder)) for folder in MEDIA_FOLDERS}
+
+
+def check_media_for_game(
+    media_path: str,
+    rom_stem: str,
+    index: "dict[str, dict[str, Path]] | None" = None,
+) -> dict[str, bool]:
+    """11種のメディアフォルダそれぞれに rom_stem.* が存在するか確認する。
+
+    複数ゲームを続けて調べる場合は index_media() の結果を index に渡す。
+    """
+    if index is None:
+        index = index_media(media_path)
+    key = os.path.normcase(rom_stem)  # Windows では大文字小文字を区別しない
+    return {folder: key in index[folder] for folder in MEDIA_FOLDERS}
+
+
+def invalidate_media_cache() -> None:
+    """メディアフォルダの索引を破棄する。メディアを追加・削除した直後に呼ぶ。
+
+    FAT 系のように更新時刻の分解能が粗いファイルシステムでも確実に反映させるため。
+    """
+    _media_dir_index.clear()
+
+
+def find_media_files(
+    media_path: str,
+    rom_stem: str,
+    index: "dict[str, dict[str, Path]] | None" = None,
+) -> dict[str, "Path | None"]:
+    """各メディアフォルダの最初にマッチしたファイルパスを返す。なければ None。
+
+    index なしの場合、フォルダごとの索引（更新時刻が変わったときだけ作り直す）を引く。
+    """
+    if index is None:
+        index = index_media(media_path)
+    key = os.path.normcase(rom_stem)
+    return {folder: index[folder].get(key) for folder in MEDIA_FOLDERS}
+
+
+# サムネイル用にデコードしてよい最大画素数（draft 適用後）。超える画像はメモリを食うため表示しない
+THUMB_MAX_PIXELS = 20_000_000
+
+
+def _thumb_cache_path(file_path: Path, mtime_ns: int) -> Path:
+    """元画像のパス・更新時刻・サムネイルサイズから決まるキャッシュPNGのパスを返す。"""
+    digest = hashlib.sha1(str(file_path).encode("utf-8")).hexdigest()
+    return THUMB_CACHE_DIR / f"{digest}_{mtime_ns}_{THUMB_W}x{THUMB_H}.png"
+
+
+def _prune_thumb_cache() -> None:
+    """キャッシュPNGが THUMB_CACHE_MAX 件を超えたら、最終利用が古いものから削除する。"""
+    with os.scandir(THUMB_CACHE_DIR) as it:
+        entries = [e for e in it if e.name.endswith(".png")]
+    excess = len(entries) - THUMB_CACHE_MAX
+    if excess > 0:
+        for old in heapq.nsmallest(excess, entries, key=lambda e: e.stat().st_mtime_ns):
+            try:
+                os.unlink(old.path)
+            except OSError:
+                pass
+
+
+# 書き込みのたびに掃除するとキャッシュが空の状態から埋めるときに走査が件数の2乗になるため、
+# 最初の1件と、以降 _THUMB_PRUNE_EVERY 件ごとにだけ掃除する（上限を一時的にこの件数まで超える）
+_THUMB_PRUNE_EVERY = 200
+_thumb_writes = 0
+_thumb_prune_lock = threading.Lock()
+
+
+def _count_thumb_write() -> None:
+    """キャッシュへの書き込みを数え、掃除の番が来たら _prune_thumb_cache を呼ぶ。"""
+    global _thumb_writes
+    with _thumb_prune_lock:
+        due = _thumb_writes % _THUMB_PRUNE_EVERY == 0
+        _thumb_writes += 1
+        if due:
+            _prune_thumb_cache()
+
+
+def decode_thumbnail(file_path: Path) -> "Image.Image | Path | None":
+    """メディアタブ用のサムネイル画像を読み込む。Pillow が必要。
+
+    Tk を触らないのでワーカースレッドから呼んでよい。
+    縮小済みの画像は THUMB_CACHE_DIR に PNG で保存し、元画像が更新されるまで再利用する。
+    キャッシュがあればデコードせずにそのパスを返す（thumbnail_photo で Tk に直接読ませる）。
+    画素数が THUMB_MAX_PIXELS を超える画像はデコードせず None を返す。
+    """
+    pil_available()
+    cache = _thumb_cache_path(file_path, os.stat(file_path).st_mtime_ns)
+    try:
+        os.utime(cache)  # 最終利用時刻を更新（_prune_thumb_cache の LRU 判定用）
+        return cache
+    except OSError:
+        pass  # キャッシュなし
+
+    # 元画像は読み終えたらすぐ閉じる（Windows では開いたままだと切り抜き・削除ができない）
+    with Image.open(file_path) as src:
+        src.draft("RGB", (THUMB_W * 2, THUMB_H * 2))  # JPEG は縮小デコードする
+        if src.width * src.height > THUMB_MAX_PIXELS:
+            # draft で縮められない形式の巨大画像は、全画素をデコードする前に諦める
+            return None
+        # この大きさでは LANCZOS との差は見分けられないため、軽い BILINEAR で縮小する
+        src.thumbnail((THUMB_W, THUMB_H), Image.BILINEAR)
+        img = src.copy()
+    try:
+        THUMB_CACHE_DIR.mkdir(exist_ok=True)
+        tmp = cache.with_suffix(f".{threading.get_ident()}.tmp")
+        img.save(tmp, "PNG", optimize=False)
+        os.replace(tmp, cache)
+        _count_thumb_write()
+    except (OSError, ValueError):
+        pass  # CMYK など PNG にできないモードや書き込み不可の場合はキャッシュしない
+    return img
+
+
+_thumb_pool: "concurrent.futures.ThreadPoolExecutor | None" = None
+
+
+def submit_thumbnail(file_path: Path) -> "concurrent.futures.Future":
+    """decode_thumbnail をワーカースレッドで実行し、その Future を返す。
+
+    PhotoImage は Tk のメインスレッドで thumbnail_photo() を使って作ること。
+    """
+    global _thumb_pool
+    if _thumb_pool is None:
+        _thumb_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="thumb")
+    return _thumb_pool.submit(decode_thumbnail, file_path)
+
+
+def thumbnail_photo(img: "Image.Image | Path") -> "tk.PhotoImage | ImageTk.PhotoImage":
+    """decode_thumbnail の結果から PhotoImage を作る（メインスレッド専用）。
+
+    キャッシュPNGのパスは Tk 8.6 以降なら Tk 自身に読ませ、Pillow を経由したバイト列の
+    コピーを省く。壊れたキャッシュは削除して例外を送出する（次回の表示で作り直される）。
+    """
+    if isinstance(img, Path):
+        try:
+            if tk.TkVersion >= 8.6:
+                return tk.PhotoImage(file=str(img))
+            pil_img = Image.open(img)
+            pil_img.load()
+            return ImageTk.PhotoImage(pil_img)
+        except (tk.TclError, OSError):
+            img.unlink(missing_ok=True)
+            raise
+    return ImageTk.PhotoImage(img)
 
 
 def open_with_default_app(file_path: Path) -> None:
@@ -65,6 +245,8 @@ def open_with_default_app(file_path: Path) -> None:
 
 def open_fullsize_image(parent: tk.Widget, file_path: Path, folder_name: str) -> None:
     """画像をフルサイズで表示する。スクリーンサイズを超える場合は縮小して表示。"""
+    if not pil_available():
+        return
     try:
         img = Image.open(file_path)
     except Exception as e:
@@ -83,7 +265,11 @@ def open_fullsize_image(parent: tk.Widget, file_path: Path, folder_name: str) ->
     disp_w = max(1, int(orig_w * scale))
     disp_h = max(1, int(orig_h * scale))
 
-    disp_img = img.resize((disp_w, disp_h), Image.LANCZOS) if scale < 1.0 else img
+    if scale < 1.0:
+        img.draft(None, (disp_w, disp_h))  # JPEG はデコード時点で 1/2〜1/8 に縮小させる
+        disp_img = img.resize((disp_w, disp_h), Image.LANCZOS)
+    else:
+        disp_img = img
     photo    = ImageTk.PhotoImage(disp_img)
 
     win.geometry(f"{disp_w}x{disp_h}")
@@ -99,6 +285,16 @@ def open_fullsize_image(parent: tk.Widget, file_path: Path, folder_name: str) ->
     win.focus_set()
 
 
+_DOWNLOAD_CHUNK = 64 * 1024
+_URL_EXT_WHITELIST = IMAGE_SUFFIXES | VIDEO_SUFFIXES | frozenset({".pdf"})  # URLの拡張子をそのまま使う形式
+
+
+@functools.lru_cache(maxsize=64)
+def _url_path_suffix(url: str) -> str:
+    """URL のパス部分の拡張子（小文字）を返す。同じ URL の再計算はキャッシュする。"""
+    return Path(urllib.parse.urlparse(url).path).suffix.lower()
+
+
 def open_url_download_dialog(
     parent: tk.Widget,
     folder: str,
@@ -144,12 +340,21 @@ def open_url_download_dialog(
     )
     dest_label.grid(row=1, column=1, sticky="ew", padx=(6, 0), pady=(4, 2))
 
+    _dest_after_id: list = [None]
+
     def _update_dest(*_) -> None:
+        # 入力1文字ごとに再計算しないよう、最後の入力から150ms後にまとめて反映する
+        if _dest_after_id[0] is not None:
+            dlg.after_cancel(_dest_after_id[0])
+        _dest_after_id[0] = dlg.after(150, _do_update_dest)
+
+    def _do_update_dest() -> None:
+        _dest_after_id[0] = None
         url = url_var.get().strip()
         if not url:
             dest_label.config(text="", fg="#555")
             return
-        path_ext = Path(urllib.parse.urlparse(url).path).suffix.lower()
+        path_ext = _url_path_suffix(url)
         if path_ext:
             dest_label.config(text=str(dest_dir / f"{stem}{path_ext}"), fg="#555")
         else:
@@ -164,60 +369,127 @@ def open_url_download_dialog(
     footer = tk.Frame(dlg, bg="#f5f5f5")
     footer.pack(fill="x", pady=6)
 
-    def do_download() -> None:
-        url = url_var.get().strip()
-        if not url:
-            messagebox.showwarning("URL未入力", "URLを入力してください。", parent=dlg)
-            return
+    def _post(callback: "callable[[], None]", on_closed: "callable[[], None] | None" = None) -> None:
+        """ワーカースレッドから Tk メインスレッドへ処理を渡す。
+
+        実行時にダイアログが閉じられていれば callback は呼ばず、代わりに on_closed を呼ぶ。
+        """
+        def run() -> None:
+            if dlg.winfo_exists():
+                callback()
+            elif on_closed is not None:
+                on_closed()
+
         try:
-            req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                content_type = resp.headers.get("Content-Type", "").split(";")[0].strip()
-                path_ext = Path(urllib.parse.urlparse(url).path).suffix.lower()
-                if path_ext in IMAGE_SUFFIXES | VIDEO_SUFFIXES | {".pdf"}:
-                    ext = path_ext
-                else:
-                    ext = mimetypes.guess_extension(content_type) or ""
-                    if ext in (".jpe", ".jpeg"):
-                        ext = ".jpg"
-                if not ext:
-                    messagebox.showwarning(
-                        "拡張子不明",
-                        "ファイル形式を判定できませんでした。\nURLを確認してください。",
-                        parent=dlg,
-                    )
-                    return
-                dest = dest_dir / f"{stem}{ext}"
-                data = resp.read()
-        except urllib.error.URLError as e:
-            messagebox.showerror("ダウンロードエラー", str(e.reason), parent=dlg)
-            return
-        except Exception as e:
-            messagebox.showerror("エラー", str(e), parent=dlg)
-            return
+            dlg.after(0, run)
+        except (RuntimeError, tk.TclError):
+            if on_closed is not None:
+                on_closed()  # メインウィンドウごと閉じられた
+
+    def _on_download_failed(title: str, msg: str, warning: bool = False) -> None:
+        btn_download.config(state="normal", text="ダウンロード & 登録")
+        if warning:
+            messagebox.showwarning(title, msg, parent=dlg)
+        else:
+            messagebox.showerror(title, msg, parent=dlg)
 
+    def _on_downloaded(dest: Path, tmp_path: Path) -> None:
+        btn_download.config(state="normal", text="ダウンロード & 登録")
         if not messagebox.askokcancel(
             "登録確認",
             f"保存先:\n{dest}\n\n登録しますか？",
             parent=dlg,
         ):
+            tmp_path.unlink(missing_ok=True)
             return
         try:
             dest_dir.mkdir(parents=True, exist_ok=True)
-            dest.write_bytes(data)
+            try:
+                os.replace(tmp_path, dest)
+            except OSError:
+                shutil.move(str(tmp_path), dest)  # 一時ファイルが別ドライブにある場合
         except Exception as e:
+            tmp_path.unlink(missing_ok=True)
             messagebox.showerror("保存エラー", str(e), parent=dlg)
             return
 
         dlg.destroy()
         on_success()
 
-    tk.Button(
+    cancelled = threading.Event()
+
+    def _download_worker(url: str) -> None:
+        # urllib.request は http.client / ssl / email まで読み込み重いため、ダウンロード時に初めてインポートする
+        import urllib.error
+        import urllib.request
+
+        tmp_path: "Path | None" = None
+        handed_off = False  # 一時ファイルの後始末をメインスレッド側に渡したか
+        try:
+            try:
+                req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    content_type = resp.headers.get("Content-Type", "").split(";")[0].strip()
+                    path_ext = _url_path_suffix(url)
+                    if path_ext in _URL_EXT_WHITELIST:
+                        ext = path_ext
+                    else:
+                        ext = mimetypes.guess_extension(content_type) or ""
+                        if ext in (".jpe", ".jpeg"):
+                            ext = ".jpg"
+                    if not ext:
+                        _post(lambda: _on_download_failed(
+                            "拡張子不明",
+                            "ファイル形式を判定できませんでした。\nURLを確認してください。",
+                            warning=True,
+                        ))
+                        return
+                    dest = dest_dir / f"{stem}{ext}"
+                    # 本体はメモリに溜めず、保存先フォルダ（なければ OS の一時フォルダ）へ直接書き出す
+                    with tempfile.NamedTemporaryFile(
+                        dir=dest_dir if dest_dir.is_dir() else None,
+                        prefix=f".{stem}.", suffix=".part", delete=False,
+                    ) as tmp:
+                        tmp_path = Path(tmp.name)
+                        for chunk in iter(lambda: resp.read(_DOWNLOAD_CHUNK), b""):
+                            if cancelled.is_set():
+                                return
+                            tmp.write(chunk)
+            except urllib.error.URLError as e:
+                _post(lambda _m=str(e.reason): _on_download_failed("ダウンロードエラー", _m))
+                return
+            except Exception as e:
+                _post(lambda _m=str(e): _on_download_failed("エラー", _m))
+                return
+            if cancelled.is_set():
+                return
+            # 登録確認の前にダイアログが閉じられた場合も一時ファイルを消す
+            _post(lambda: _on_downloaded(dest, tmp_path), on_closed=lambda: tmp_path.unlink(missing_ok=True))
+            handed_off = True
+        finally:
+            if not handed_off and tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+
+    def do_download() -> None:
+        url = url_var.get().strip()
+        if not url:
+            messagebox.showwarning("URL未入力", "URLを入力してください。", parent=dlg)
+            return
+        btn_download.config(state="disabled", text="ダウンロード中...")
+        threading.Thread(target=_download_worker, args=(url,), daemon=True).start()
+
+    def close_dialog() -> None:
+        cancelled.set()  # 実行中のダウンロードは次のチャンクで中断し、一時ファイルを消す
+        dlg.destroy()
+
+    btn_download = tk.Button(
         footer, text="ダウンロード & 登録", font=("Arial", 9), width=16, command=do_download,
-    ).pack(side="left", padx=(12, 6))
+    )
+    btn_download.pack(side="left", padx=(12, 6))
     tk.Button(
-        footer, text="閉じる", font=("Arial", 9), width=8, command=dlg.destroy,
+        footer, text="閉じる", font=("Arial", 9), width=8, command=close_dialog,
     ).pack(side="right", padx=12)
+    dlg.protocol("WM_DELETE_WINDOW", close_dialog)
 
     url_entry.focus_set()
 
@@ -231,7 +503,7 @@ def open_cover_crop_dialog(
     on_success: "callable[[], None]",
 ) -> None:
     """covers画像からロゴ領域をドラッグ選択で切り出し、marqueesに保存するダイアログ。PILが必要。"""
-    if not _PIL_OK:
+    if not pil_available():
         messagebox.showwarning(
             "Pillow未インストール",
             "この機能にはPillowが必要です。\npip install pillow を実行してください。",
@@ -239,20 +511,32 @@ def open_cover_crop_dialog(
         )
         return
 
+    # 表示用は縮小デコードで読み込み、原寸画像は切り出し/AI検出で必要になるまで読まない
     try:
-        orig_img = Image.open(cover_path).convert("RGBA")
+        src_img = Image.open(cover_path)
+        orig_w, orig_h = src_img.size
+
+        # 表示用スケーリング（最大 600×600 に収める）
+        MAX_DISP = 600
+        scale = min(MAX_DISP / orig_w, MAX_DISP / orig_h, 1.0)
+        disp_w = max(1, int(orig_w * scale))
+        disp_h = max(1, int(orig_h * scale))
+        if scale < 1.0:
+            src_img.draft(None, (disp_w, disp_h))
+            disp_img = src_img.convert("RGBA").resize((disp_w, disp_h), Image.LANCZOS)
+        else:
+            disp_img = src_img.convert("RGBA")
     except Exception as e:
         messagebox.showerror("画像読み込みエラー", str(e), parent=parent)
         return
 
-    orig_w, orig_h = orig_img.size
+    _orig_holder: list = [None]
 
-    # 表示用スケーリング（最大 600×600 に収める）
-    MAX_DISP = 600
-    scale = min(MAX_DISP / orig_w, MAX_DISP / orig_h, 1.0)
-    disp_w = max(1, int(orig_w * scale))
-    disp_h = max(1, int(orig_h * scale))
-    disp_img = orig_img.resize((disp_w, disp_h), Image.LANCZOS) if scale < 1.0 else orig_img.copy()
+    def _orig_img() -> "Image.Image":
+        """原寸の RGBA 画像を初回のみデコードして返す。"""
+        if _orig_holder[0] is None:
+            _orig_holder[0] = Image.open(cover_path).convert("RGBA")
+        return _orig_holder[0]
 
     dlg = tk.Toplevel(parent)
     dlg.title("covers → marquees 切り出し")
@@ -328,7 +612,7 @@ def open_cover_crop_dialog(
         dlg.update_idletasks()
         try:
             from src.media.logo_extractor import extract_logo
-            logo_img = extract_logo(orig_img, transparent=True)
+            logo_img = extract_logo(_orig_img(), transparent=True)
         except Exception as e:
             hint_label.config(text=f"  AI検出エラー: {e}", fg="#cc0000")
             return
@@ -340,7 +624,7 @@ def open_cover_crop_dialog(
         ai_result["logo_img"] = logo_img
 
         from src.media.logo_extractor import detect_logo
-        detections = detect_logo(orig_img)
+        detections = detect_logo(_orig_img())
         if detections:
             best = detections[0]
             _set_selection(
@@ -357,7 +641,7 @@ def open_cover_crop_dialog(
     footer = tk.Frame(dlg, bg="#f5f5f5")
     footer.pack(fill="x", pady=6)
 
-    def _save_and_close(image_to_save: Image.Image) -> None:
+    def _save_and_close(image_to_save: "Image.Image") -> None:
         dest = Path(media_path) / "marquees" / f"{stem}.png"
         if not messagebox.askokcancel(
             "登録確認",
@@ -398,8 +682,14 @@ def open_cover_crop_dialog(
         oy1 = int(y1 / scale)
         ox2 = int(x2 / scale)
         oy2 = int(y2 / scale)
-        _save_and_close(orig_img.crop((ox1, oy1, ox2, oy2)))
+        try:
+            cropped = _orig_img().crop((ox1, oy1, ox2, oy2))
+        except Exception as e:
+            messagebox.showerror("画像読み込みエラー", str(e), parent=dlg)
+            return
+        _save_and_close(cropped)
 
+    from src.media.logo_extractor import is_available as _ai_logo_available
     if _ai_logo_available():
         tk.Button(
             footer, text="AI検出", font=("Arial", 9, "bold"), width=10,
@@ -425,7 +715,7 @@ def open_miximage_dialog(
     on_success: "callable[[], None]",
 ) -> None:
     """各メディア素材から miximage を生成・プレビューして保存するダイアログ。"""
-    if not _PIL_OK:
+    if not pil_available():
         messagebox.showwarning(
             "Pillow未インストール",
             "この機能にはPillowが必要です。\npip install pillow を実行してください。",
@@ -433,6 +723,8 @@ def open_miximage_dialog(
         )
         return
 
+    from src.media.miximage import generate_miximage, CANVAS_W, CANVAS_H
+
     file_map = find_media_files(media_path, stem)
     ss_path = file_map.get("screenshots")
     if ss_path is None:
@@ -544,6 +836,46 @@ def open_miximage_dialog(
     ).pack(side="right", padx=12)
 
 
+def _visible_row_count(tree_height: int, header_height: int, row_height: int) -> int:
+    """見出しを除いた Treeview の高さに丸ごと収まる行数を返す（最低1行）。"""
+    return max(1, (tree_height - header_height) // max(1, row_height))
+
+
+def _clamp_offset(offset: int, total: int, page: int) -> int:
+    """仮想スクロールの先頭行を、最後のページが末尾で止まる範囲に収める。"""
+    return max(0, min(offset, total - page))
+
+
+def _treeview_row_metrics(tree: tk.Widget) -> "tuple[int, int] | None":
+    """先頭行の bbox から (見出しの高さ, 1行の高さ) を実測する。行が未配置なら None。"""
+    items = tree.get_children()
+    bbox = tree.bbox(items[0]) if items else ""
+    if not bbox:
+        return None
+    return bbox[1], bbox[3]
+
+
+def _estimated_row_height(tree: tk.Widget) -> int:
+    """実測できるまでの行の高さの見積もり。
+
+    Style の rowheight は既定テーマや高DPI環境では空文字が返ることが多いため、
+    その場合は行フォントの linespace から求める。
+    """
+    from tkinter import ttk, font as tkfont
+    style = ttk.Style(tree)
+    try:
+        height = int(style.lookup("Treeview", "rowheight") or 0)
+    except (tk.TclError, ValueError):
+        height = 0
+    if height > 0:
+        return height
+    try:
+        row_font = tkfont.nametofont(style.lookup("Treeview", "font") or "TkDefaultFont")
+    except tk.TclError:
+        row_font = tkfont.nametofont("TkDefaultFont")
+    return row_font.metrics("linespace") + 4  # 上下の余白ぶん
+
+
 def open_media_check_window(parent: tk.Tk, config: dict, system: str, games: list[ET.Element]) -> None:
     """メディアファイル過不足チェックダイアログを開く。"""
     media_path = resolve_paths(config, system)["media_path"]
@@ -574,8 +906,8 @@ def open_media_check_window(parent: tk.Tk, config: dict, system: str, games: lis
     table_frame = tk.Frame(win)
     table_frame.pack(fill="both", expand=True, padx=8, pady=4)
 
-    columns = ["title"] + MEDIA_FOLDERS
-    col_headers = ["タイトル"] + MEDIA_FOLDERS
+    columns = ("title", *MEDIA_FOLDERS)
+    col_headers = ("タイトル", *MEDIA_FOLDERS)
 
     tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="none")
 
@@ -587,10 +919,10 @@ def open_media_check_window(parent: tk.Tk, config: dict, system: str, games: lis
     for col, header in zip(columns, col_headers):
         tree.heading(col, text=header)
 
-    # スクロールバー
-    vsb = ttk.Scrollbar(table_frame, orient="vertical",   command=tree.yview)
+    # スクロールバー（縦方向は表示中の行だけを Treeview に持たせる仮想スクロール）
+    vsb = ttk.Scrollbar(table_frame, orient="vertical")
     hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
-    tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+    tree.configure(xscrollcommand=hsb.set)
     tree.grid(row=0, column=0, sticky="nsew")
     vsb.grid(row=0,  column=1, sticky="ns")
     hsb.grid(row=1,  column=0, sticky="ew")
@@ -602,33 +934,108 @@ def open_media_check_window(parent: tk.Tk, config: dict, system: str, games: lis
     tree.tag_configure("missing", background="#fff0f0")
 
     # ── データ収集・描画 ────────────────────────────────────────
-    def get_field_local(game: ET.Element, key: str) -> str:
-        el = game.find(key)
-        return (el.text or "") if el is not None else ""
-
-    rows: list[tuple[str, dict[str, bool], bool]] = []  # (title, result_dict, has_missing)
+    def path_and_name(game: ET.Element) -> tuple[str, str]:
+        """子要素を1回だけ走査して <path> と <name> の値を返す。"""
+        path_val = name_val = None
+        for child in game:
+            if child.tag == "path" and path_val is None:
+                path_val = child.text or ""
+            elif child.tag == "name" and name_val is None:
+                name_val = child.text or ""
+            if path_val is not None and name_val is not None:
+                break  # ES-DE は path, name の順に先頭へ書くため、通常は2要素目で抜ける
+        return path_val or "", name_val or ""
+
+    media_index = index_media(media_path)
+    all_missing = ("-",) * len(MEDIA_FOLDERS)
+    rows: list[tuple[str, tuple[str, ...], bool]] = []  # (title, ○/- の列値, has_missing)
     for game in games:
-        path_val = get_field_local(game, "path")
-        title    = get_field_local(game, "name") or path_val or "(不明)"
+        path_val, name_val = path_and_name(game)
+        title = name_val or path_val or "(不明)"
         if not path_val:
-            rows.append((title, {f: False for f in MEDIA_FOLDERS}, True))
+            rows.append((title, all_missing, True))
             continue
         stem   = get_rom_stem(path_val)
-        result = check_media_for_game(media_path, stem)
-        has_missing = not all(result.values())
-        rows.append((title, result, has_missing))
+        result = check_media_for_game(media_path, stem, media_index)
+        symbols = tuple("○" if result[f] else "-" for f in MEDIA_FOLDERS)
+        rows.append((title, symbols, not all(result.values())))
 
     missing_count = sum(1 for _, _, hm in rows if hm)
 
+    view: dict = {"rows": [], "offset": 0, "page": 1}
+
+    def _render_window() -> None:
+        """view["offset"] から1ページ分の行だけを Treeview に反映する。"""
+        shown = view["rows"]
+        page  = view["page"]
+        view["offset"] = offset = _clamp_offset(view["offset"], len(shown), page)
+        window = shown[offset:offset + page]
+        items  = tree.get_children()
+        if len(items) > len(window):
+            tree.delete(*items[len(window):])
+        for i, (title, symbols, has_missing) in enumerate(window):
+            values = (title, *symbols)
+            tag = "missing" if has_missing else "ok"
+            if i < len(items):
+                tree.item(items[i], values=values, tags=(tag,))
+            else:
+                tree.insert("", "end", values=values, tags=(tag,))
+        if shown:
+            vsb.set(offset / len(shown), min(1.0, (offset + page) / len(shown)))
+        else:
+            vsb.set(0.0, 1.0)
+
+    def _scroll_to(offset: int) -> None:
+        if offset != view["offset"]:
+            view["offset"] = offset
+            _render_window()
+
+    def _on_vsb(*args) -> None:
+        if args[0] == "moveto":
+            _scroll_to(int(float(args[1]) * len(view["rows"])))
+        elif args[0] == "scroll":
+            step = view["page"] if args[2] == "pages" else 1
+            _scroll_to(view["offset"] + int(args[1]) * step)
+
+    def _on_tree_wheel(e: tk.Event) -> str:
+        if e.num == 4:
+            delta = -3
+        elif e.num == 5:
+            delta = 3
+        else:
+            delta = -3 if e.delta > 0 else 3
+        _scroll_to(view["offset"] + delta)
+        return "break"
+
+    def _update_page() -> None:
+        """行の高さを測り直し、画面に収まる行数をページサイズにする。"""
+        metrics = _treeview_row_metrics(tree)
+        if metrics is None:
+            row_height = _estimated_row_height(tree)
+            header_height = row_height
+        else:
+            header_height, row_height = metrics
+        page = _visible_row_count(tree.winfo_height(), header_height, row_height)
+        if page != view["page"]:
+            view["page"] = page
+            _render_window()
+            if metrics is None:
+                tree.after_idle(_update_page)  # 行を配置したあとの実測値で合わせ直す
+
+    def _on_tree_configure(_e: tk.Event) -> None:
+        _update_page()
+
+    vsb.config(command=_on_vsb)
+    tree.bind("<MouseWheel>", _on_tree_wheel)
+    tree.bind("<Button-4>",   _on_tree_wheel)
+    tree.bind("<Button-5>",   _on_tree_wheel)
+    tree.bind("<Configure>",  _on_tree_configure)
+
     def refresh_table() -> None:
-        tree.delete(*tree.get_children())
         show_missing_only = only_missing_var.get()
-        for title, result, has_missing in rows:
-            if show_missing_only and not has_missing:
-                continue
-            values = [title] + ["○" if result[f] else "-" for f in MEDIA_FOLDERS]
-            tag = "missing" if has_missing else "ok"
-            tree.insert("", "end", values=values, tags=(tag,))
+        view["rows"] = [r for r in rows if r[2]] if show_missing_only else rows
+        view["offset"] = 0
+        _render_window()
 
     def update_summary() -> None:
         summary_label.config(text=f"{len(games)} ゲーム中 {missing_count} ゲームに欠損あり")
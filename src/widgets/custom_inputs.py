@@ -1,5 +1,5 @@
 import tkinter as tk
-from datetime import date, datetime
+from datetime import date
 
 from tkcalendar import DateEntry
 
@@ -15,18 +15,21 @@ class DateInput(tk.Frame):
         self._entry = DateEntry(self, date_pattern="yyyy/mm/dd", font=("Arial", 9), width=12,
                                state="disabled", year=2000, month=1, day=1)
         self._entry.pack(side="left", padx=(6, 0))
+        self._loaded = ""  # set_date_str 直後の get_date_str() の値
 
     def _on_toggle(self) -> None:
         self._entry.config(state="normal" if self._enabled.get() else "disabled")
 
     def set_date_str(self, s: str) -> None:
         """XML形式 (YYYYMMDDTHHMMSS) の文字列をセットする。空なら未設定状態にする。"""
-        if s:
+        # strptime は呼ぶたびに書式を解釈するため、先頭8桁の YYYYMMDD を直接切り出す
+        if len(s) >= 8 and s[:8].isdigit():
             try:
-                d = datetime.strptime(s, "%Y%m%dT%H%M%S").date()
+                d = date(int(s[0:4]), int(s[4:6]), int(s[6:8]))
                 self._entry.config(state="normal")
                 self._entry.set_date(d)
                 self._enabled.set(True)
+                self._loaded = self.get_date_str()
                 return
             except ValueError:
                 pass
@@ -34,12 +37,22 @@ class DateInput(tk.Frame):
         self._entry.set_date(date(2000, 1, 1))
         self._entry.config(state="disabled")
         self._enabled.set(False)
+        self._loaded = ""
 
     def get_date_str(self) -> str:
         """XML形式の文字列を返す。未設定の場合は空文字列。"""
         if not self._enabled.get():
             return ""
-        return self._entry.get_date().strftime("%Y%m%dT000000")
+        d = self._entry.get_date()
+        return f"{d.year:04d}{d.month:02d}{d.day:02d}T000000"
+
+    def is_modified(self) -> bool:
+        """最後の set_date_str から値が変わったかどうか。"""
+        return self.get_date_str() != self._loaded
+
+    def mark_saved(self) -> None:
+        """現在の値を基準にし、is_modified() を False に戻す。"""
+        self._loaded = self.get_date_str()
 
 
 class TagInput(tk.Frame):
@@ -51,42 +64,68 @@ class TagInput(tk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent, relief="sunken", bd=1, bg="white", **kwargs)
         self._tags: list[str] = []
+        # タグ → チップ。self._tags と常に同じキー集合を持ち、重複判定の set も兼ねる
+        self._chips: dict[str, tk.Frame] = {}
+        self._modified = False  # set_tags 以降にユーザーがタグを追加・削除したか
         self._var = tk.StringVar()
-        self._render()
+        self._entry = tk.Entry(self, textvariable=self._var, font=("Arial", 9), relief="flat", bd=0, bg="white")
+        self._entry.pack(side="left", fill="x", expand=True, padx=(4, 4), pady=3)
+        self._entry.bind("<Return>",   self._add)
+        self._entry.bind("<KP_Enter>", self._add)
+
+    def _make_chip(self, tag: str) -> tk.Frame:
+        chip = tk.Frame(self, bg=self.TAG_BG, relief="flat", bd=1)
+        tk.Label(chip, text=tag, bg=self.TAG_BG, font=("Arial", 9), padx=4, pady=1).pack(side="left")
+        tk.Button(
+            chip, text="×", bg=self.TAG_BG, relief="flat",
+            font=("Arial", 8), padx=2, pady=0, bd=0, cursor="hand2",
+            command=lambda t=tag: self._remove(t),
+        ).pack(side="left")
+        self._chips[tag] = chip
+        return chip
+
+    def _pack_chip(self, chip: tk.Frame) -> None:
+        chip.pack(side="left", padx=(3, 0), pady=3, before=self._entry)
 
     def _render(self) -> None:
-        for w in self.winfo_children():
-            w.destroy()
+        """self._tags とチップの差分だけを反映し、表示順を揃える。"""
+        wanted = set(self._tags)
+        for tag in [t for t in self._chips if t not in wanted]:
+            self._chips.pop(tag).destroy()
         for tag in self._tags:
-            chip = tk.Frame(self, bg=self.TAG_BG, relief="flat", bd=1)
-            chip.pack(side="left", padx=(3, 0), pady=3)
-            tk.Label(chip, text=tag, bg=self.TAG_BG, font=("Arial", 9), padx=4, pady=1).pack(side="left")
-            tk.Button(
-                chip, text="×", bg=self.TAG_BG, relief="flat",
-                font=("Arial", 8), padx=2, pady=0, bd=0, cursor="hand2",
-                command=lambda t=tag: self._remove(t),
-            ).pack(side="left")
-        entry = tk.Entry(self, textvariable=self._var, font=("Arial", 9), relief="flat", bd=0, bg="white")
-        entry.pack(side="left", fill="x", expand=True, padx=(4, 4), pady=3)
-        entry.bind("<Return>",   self._add)
-        entry.bind("<KP_Enter>", self._add)
+            chip = self._chips.get(tag)
+            if chip is None:
+                chip = self._make_chip(tag)
+            chip.pack_forget()
+            self._pack_chip(chip)
 
     def _add(self, _=None) -> None:
         val = self._var.get().strip()
-        if val and val not in self._tags:
+        if val and val not in self._chips:
             self._tags.append(val)
             self._var.set("")
-            self._render()
+            self._pack_chip(self._make_chip(val))
+            self._modified = True
 
     def _remove(self, tag: str) -> None:
-        if tag in self._tags:
+        if tag in self._chips:
             self._tags.remove(tag)
-            self._render()
+            self._chips.pop(tag).destroy()
+            self._modified = True
 
     def set_tags(self, tags: list[str]) -> None:
-        self._tags = [t for t in tags if t]
+        self._tags = list(dict.fromkeys(t for t in tags if t))  # 重複タグは1チップにまとめる
         self._var.set("")  # 入力途中のテキストもクリア
+        self._modified = False
         self._render()
 
     def get_tags(self) -> list[str]:
         return list(self._tags)
+
+    def is_modified(self) -> bool:
+        """最後の set_tags からタグが追加・削除されたかどうか。"""
+        return self._modified
+
+    def mark_saved(self) -> None:
+        """現在のタグを基準にし、is_modified() を False に戻す。"""
+        self._modified = False
@@ -0,0 +1,90 @@
+"""メディアチェック画面の仮想スクロールで最後の行まで表示できることの確認。"""
+
+import tempfile
+import tkinter as tk
+import unittest
+import xml.etree.ElementTree as ET
+
+from src.media.processor import (
+    _clamp_offset, _visible_row_count, _treeview_row_metrics, open_media_check_window,
+)
+
+
+def _tk_root() -> "tk.Tk | None":
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+
+class PageSizeTest(unittest.TestCase):
+    def test_last_row_reachable_with_tall_rows(self):
+        # 高DPI などで 20px より高い行でも、最終ページに最後の行が収まる
+        total, tree_h, header_h, row_h = 100, 400, 27, 27
+        page = _visible_row_count(tree_h, header_h, row_h)
+        self.assertLessEqual(header_h + page * row_h, tree_h)
+        last = _clamp_offset(10**9, total, page)
+        self.assertIn(total - 1, range(last, last + page))
+
+    def test_page_is_at_least_one_row(self):
+        self.assertEqual(_visible_row_count(10, 25, 25), 1)
+
+    def test_offset_clamped_when_rows_fit(self):
+        self.assertEqual(_clamp_offset(5, 3, 10), 0)
+
+
+class MediaCheckWindowTest(unittest.TestCase):
+    def setUp(self):
+        self.root = _tk_root()
+        if self.root is None:
+            self.skipTest("ディスプレイがないため Tk を起動できない")
+        self.addCleanup(self.root.destroy)
+
+    def test_row_metrics_follow_style_rowheight(self):
+        from tkinter import ttk
+        ttk.Style(self.root).configure("Tall.Treeview", rowheight=31)
+        win = tk.Toplevel(self.root)
+        tree = ttk.Treeview(win, columns=("a",), show="headings", style="Tall.Treeview")
+        tree.pack(fill="both", expand=True)
+        tree.insert("", "end", values=("x",))
+        win.update()
+        header_h, row_h = _treeview_row_metrics(tree)
+        self.assertEqual(row_h, 31)
+        self.assertGreater(header_h, 0)
+
+    def test_scroll_to_end_shows_last_row(self):
+        from tkinter import ttk
+        ttk.Style(self.root).configure("Treeview", rowheight=33)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        config = {"environment": "test", "test": {"media_base": media.name}}
+        games = []
+        for i in range(200):
+            game = ET.Element("game")
+            ET.SubElement(game, "path").text = f"./game{i:03d}.iso"
+            ET.SubElement(game, "name").text = f"Game {i:03d}"
+            games.append(game)
+
+        open_media_check_window(self.root, config, "ps2", games)
+        win = self.root.winfo_children()[-1]
+        self.root.update()
+        tree = vsb = None
+        for frame in win.winfo_children():
+            for child in frame.winfo_children():
+                if isinstance(child, ttk.Treeview):
+                    tree = child
+                elif isinstance(child, ttk.Scrollbar) and str(child.cget("orient")) == "vertical":
+                    vsb = child
+        self.root.tk.eval(f"{vsb.cget('command')} moveto 1.0")
+        self.root.update()
+
+        items = tree.get_children()
+        self.assertEqual(tree.item(items[-1], "values")[0], "Game 199")
+        _x, y, _w, h = tree.bbox(items[-1])
+        self.assertLessEqual(y + h, tree.winfo_height())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""同期の quick check（サイズ＋更新時刻）で転送済みファイルを飛ばせることの確認。"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.core import sync_manager
+from src.core.sync_manager import _up_to_date
+
+
+class UpToDateTest(unittest.TestCase):
+    def test_same_size_and_mtime(self):
+        self.assertTrue(_up_to_date(10, 1000.4, 10, 1000))
+
+    def test_newer_source_is_sent(self):
+        self.assertFalse(_up_to_date(10, 2000.0, 10, 1000))
+
+    def test_older_source_is_sent(self):
+        # バックアップからの復元などで転送元が古くなった場合も揃え直す
+        self.assertFalse(_up_to_date(10, 1000.0, 10, 2000))
+
+    def test_missing_mtime_is_sent(self):
+        self.assertFalse(_up_to_date(10, None, 10, 1000))
+        self.assertFalse(_up_to_date(10, 1000, 10, None))
+
+    def test_size_mismatch_is_sent(self):
+        self.assertFalse(_up_to_date(10, 1000, 11, 1000))
+
+
+class _FakeSFTP:
+    """リモートをローカルの一時ディレクトリに見立てた SFTPClient の代役。
+
+    put / get は実物と同じく更新時刻を引き継がない。
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+
+    def _p(self, remote: str) -> Path:
+        return self._root / remote.lstrip("/")
+
+    def listdir_attr(self, remote_dir: str):
+        from paramiko import SFTPAttributes
+        d = self._p(remote_dir)
+        if not d.is_dir():
+            raise FileNotFoundError(remote_dir)
+        return [SFTPAttributes.from_stat(os.stat(d / n), n) for n in os.listdir(d)]
+
+    def stat(self, remote: str):
+        from paramiko import SFTPAttributes
+        p = self._p(remote)
+        if not p.exists():
+            raise FileNotFoundError(remote)
+        return SFTPAttributes.from_stat(os.stat(p), p.name)
+
+    def mkdir(self, remote: str) -> None:
+        self._p(remote).mkdir()
+
+    def put(self, local: str, remote: str) -> None:
+        shutil.copyfile(local, self._p(remote))
+
+    def get(self, remote: str, local: str) -> None:
+        shutil.copyfile(self._p(remote), local)
+
+    def utime(self, remote: str, times) -> None:
+        os.utime(self._p(remote), times)
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeClient:
+    def __init__(self, root: Path):
+        self._root = root
+
+    def open_sftp(self) -> _FakeSFTP:
+        return _FakeSFTP(self._root)
+
+
+@unittest.skipIf(not sync_manager._PARAMIKO_OK, "paramiko がインストールされていない")
+class SyncRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.local = Path(tmp.name) / "local"
+        self.remote = Path(tmp.name) / "remote"
+        self.local.mkdir()
+        self.remote.mkdir()
+        for name in ("a.png", "b.png"):
+            (self.local / name).write_bytes(b"x" * 16)
+            os.utime(self.local / name, (1_600_000_000, 1_600_000_000))
+        client = _FakeClient(self.remote)
+        patcher = mock.patch.object(
+            sync_manager, "_open_sftp", lambda *_: (client, client.open_sftp()),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _push(self):
+        tasks = [(self.local / n, f"/media/{n}") for n in ("a.png", "b.png")]
+        return sync_manager.transfer_files("h", 22, "u", "p", tasks, False, lambda _m: None, lambda _p: None)
+
+    def _pull(self, dest: Path):
+        return sync_manager.pull_files(
+            "h", 22, "u", "p", [], [("/media", dest)], False, lambda _m: None, lambda _p: None,
+        )
+
+    def test_second_push_skips(self):
+        self.assertEqual(self._push(), (2, 0, 0))
+        self.assertEqual(self._push(), (0, 2, 0))
+
+    def test_push_resends_newer_source(self):
+        self._push()
+        os.utime(self.local / "a.png", (1_700_000_000, 1_700_000_000))
+        self.assertEqual(self._push(), (1, 1, 0))
+
+    def test_second_pull_skips(self):
+        self._push()
+        dest = self.local / "pulled"
+        self.assertEqual(self._pull(dest), (2, 0, 0))
+        self.assertEqual(self._pull(dest), (0, 2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""サムネイルのデコードとキャッシュ掃除の確認。"""
+
+import gc
+import tempfile
+import unittest
+import warnings
+from pathlib import Path
+from unittest import mock
+
+from src.media import processor
+
+
+@unittest.skipIf(not processor.pil_available(), "Pillow がインストールされていない")
+class DecodeThumbnailTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src_dir = Path(tmp.name) / "src"
+        self.src_dir.mkdir()
+        for name, value in (("THUMB_CACHE_DIR", Path(tmp.name) / "cache"), ("_thumb_writes", 0)):
+            patcher = mock.patch.object(processor, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _image(self, name: str) -> Path:
+        path = self.src_dir / name
+        processor.Image.new("RGB", (800, 600), "red").save(path)
+        return path
+
+    def test_prune_runs_once_per_batch_of_writes(self):
+        paths = [self._image(f"{i}.png") for i in range(5)]
+        with mock.patch.object(processor, "_prune_thumb_cache") as prune:
+            for path in paths:
+                processor.decode_thumbnail(path)
+        self.assertEqual(prune.call_count, 1)
+
+    def test_source_file_is_closed_when_decode_fails(self):
+        path = self._image("a.jpg")
+        data = path.read_bytes()
+        path.write_bytes(data[:len(data) // 2])  # 途中で切れた JPEG は縮小時に例外になる
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            with self.assertRaises(OSError):
+                processor.decode_thumbnail(path)
+            gc.collect()
+        self.assertFalse([w for w in caught if issubclass(w.category, ResourceWarning)])
+
+    def test_returns_thumbnail_sized_copy(self):
+        img = processor.decode_thumbnail(self._image("b.jpg"))
+        self.assertLessEqual(img.width, processor.THUMB_W)
+        self.assertLessEqual(img.height, processor.THUMB_H)
+
+if __name__ == "__main__":
+    unittest.main()